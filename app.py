@@ -2,8 +2,12 @@ import streamlit as st
 import os
 from dotenv import load_dotenv
 import tempfile
+import threading
+import numpy as np
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # Load environment variables
 load_dotenv()
@@ -17,6 +21,11 @@ from services.ocr_utils import OCRService
 from services.gemini_client import GeminiClient
 from services.corpus_loader import CorpusService
 
+# Directory where the vector store is persisted between runs
+VECTOR_STORE_DIR = os.getenv('VECTOR_STORE_DIR', 'data/vector_store')
+# Set FAISS_USE_GPU=1 to train large vector indexes on a GPU (needs faiss-gpu)
+FAISS_USE_GPU = os.getenv('FAISS_USE_GPU', '0') == '1'
+
 # Configure Streamlit page
 st.set_page_config(
     page_title="Deep Research Assistant",
@@ -25,19 +34,476 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize services in session state
+# Initialize services once per process
 @st.cache_resource
-def init_services(api_key: str):
-    """Initialize all services"""
+def _static_services():
+    """Initialize the services that do not depend on the API key"""
     return {
         'search': DDGSearchService(),
         'parser': ContentParser(),
         'embeddings': EmbeddingService(),
         'ocr': OCRService(),
-        'gemini': GeminiClient(api_key=api_key),
         'corpus': CorpusService()
     }
 
+@st.cache_resource
+def _gemini(api_key: str):
+    """Initialize the Gemini client for an API key"""
+    return GeminiClient(api_key=api_key)
+
+def init_services(api_key: str):
+    """Initialize all services; changing the API key only rebuilds the Gemini client"""
+    return {**_static_services(), 'gemini': _gemini(api_key)}
+
+@st.cache_resource
+def get_vector_store():
+    """Load the vector store once per process, shared across reruns and sessions"""
+    vector_store = VectorStore(persist_dir=VECTOR_STORE_DIR, use_gpu=FAISS_USE_GPU)
+    vector_store.load_from_disk()
+    return vector_store
+
+class _NoResults(Exception):
+    """Raised inside _cached_fetch so empty results are not memoized"""
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_fetch(_service, method: str, query: str, max_results: int) -> List[Dict]:
+    """Run a search/fetch method; results are memoized per (method, query, max_results)"""
+    results = getattr(_service, method)(query, max_results)
+    if not results:
+        # The services return [] on errors such as rate limits; raising keeps
+        # st.cache_data from hiding the query's results until the TTL expires
+        raise _NoResults()
+    return results
+
+def cached_fetch(service, method: str, query: str, max_results: int) -> List[Dict]:
+    """Call a search or corpus method through the result cache with a normalized query"""
+    try:
+        return _cached_fetch(service, method, query.lower().strip(), max_results)
+    except _NoResults:
+        return []
+
+@st.fragment
+def render_sidebar(vector_store: VectorStore):
+    """Sidebar settings and vector store stats"""
+    st.header("⚙️ Configuration")
+
+    # Research settings; tabs read these from session state so a slider
+    # change only reruns this fragment
+    st.subheader("🔧 Search Settings")
+    st.slider("Max search results", 5, 20, 10, key='max_search_results')
+    st.slider("Max URLs to parse", 3, 15, 5, key='max_urls_to_parse')
+    st.slider("Text chunk size", 500, 2000, 1000, key='chunk_size')
+
+    # Vector store stats
+    st.subheader("📊 Vector Store Stats")
+    stats = vector_store.get_stats()
+    st.metric("Documents", stats['num_documents'])
+    st.metric("Embedding Dimension", stats.get('dimension', 0))
+
+    if st.button("🗑️ Clear Vector Store"):
+        vector_store.clear()
+        st.rerun()
+
+@st.fragment
+def render_research_tab(services: Dict, vector_store: VectorStore):
+    """Tab 1: Research a topic via web, news and corpus search"""
+    max_search_results = st.session_state.max_search_results
+    max_urls_to_parse = st.session_state.max_urls_to_parse
+    chunk_size = st.session_state.chunk_size
+
+    st.header("🔍 Research a Topic")
+
+    research_query = st.text_input(
+        "Enter your research topic:",
+        placeholder="e.g., artificial intelligence in healthcare, climate change impacts, quantum computing"
+    )
+
+    col1, col2 = st.columns(2)
+    with col1:
+        search_web = st.checkbox("🌐 Web Search", value=True)
+        search_news = st.checkbox("📰 News Search", value=True)
+
+    with col2:
+        extract_content = st.checkbox("📝 Extract Full Content", value=True)
+        generate_embeddings = st.checkbox("🧠 Generate Embeddings", value=True)
+
+    if st.button("🚀 Start Research", type="primary"):
+        if not research_query:
+            st.error("Please enter a research topic!")
+            return
+
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+
+        all_documents = []
+
+        # Steps 1-2.5: Web, news, and scriptures & old books searches are
+        # independent network calls, so run them concurrently
+        status_text.text("🔍 Searching the web, news, and scriptures & old books...")
+        progress_bar.progress(5)
+
+        ctx = get_script_run_ctx()
+        with ThreadPoolExecutor(
+            max_workers=4,
+            initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)
+        ) as executor:
+            futures = {
+                executor.submit(cached_fetch, services['corpus'], 'fetch_from_gutenberg', research_query, 2): 'gutenberg',
+                executor.submit(cached_fetch, services['corpus'], 'fetch_from_archive', research_query, 1): 'archive'
+            }
+            if search_web:
+                futures[executor.submit(cached_fetch, services['search'], 'search_web', research_query, max_search_results)] = 'web'
+            if search_news:
+                futures[executor.submit(cached_fetch, services['search'], 'search_news', research_query, max_search_results//2)] = 'news'
+
+            search_results = {}
+            for completed, future in enumerate(as_completed(futures), 1):
+                search_results[futures[future]] = future.result()
+                progress_bar.progress(5 + 25 * completed // len(futures))
+
+        web_results = search_results.get('web', [])
+        news_results = search_results.get('news', [])
+        book_results = search_results['gutenberg']
+        archive_results = search_results['archive']
+
+        # Step 2.5: Scriptures & Old Books Search
+        all_books = book_results + archive_results
+        all_documents.extend(all_books)
+
+        # Step 3: Extract Content
+        num_extracted = None
+        if extract_content:
+            status_text.text("📝 Extracting content from URLs...")
+            progress_bar.progress(50)
+
+            # Combine all URLs
+            all_urls = []
+            if search_web:
+                all_urls.extend([r['url'] for r in web_results])
+            if search_news:
+                all_urls.extend([r['url'] for r in news_results])
+
+            # Extract content from top URLs, skipping ones found by both searches
+            # and ones a HEAD request shows are not HTML pages
+            unique_urls = services['parser'].dedupe_urls(all_urls)
+            urls_to_extract = services['parser'].filter_html_urls(unique_urls, limit=max_urls_to_parse)
+
+            extraction_progress = st.empty()
+
+            def progress_callback(current, total, url):
+                extraction_progress.text(f"Extracting {current}/{total}: {url[:50]}...")
+
+            extracted_docs = services['parser'].extract_multiple_urls(
+                urls_to_extract, 
+                progress_callback
+            )
+
+            # Filter successful extractions
+            successful_docs = [doc for doc in extracted_docs if len(doc['content']) > 100]
+            all_documents.extend(successful_docs)
+            num_extracted = len(successful_docs)
+
+        # Step 4: Generate Embeddings
+        num_chunks = None
+        if generate_embeddings and all_documents:
+            status_text.text("🧠 Generating embeddings...")
+            progress_bar.progress(80)
+
+            # Chunk documents and embed all chunks in one batch
+            processed_chunks, embeddings = services['embeddings'].process_and_embed_documents(
+                all_documents, chunk_size
+            )
+            embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+            if embeddings.size > 0:
+                # Add to vector store
+                vector_store.add_documents(embeddings, processed_chunks)
+                num_chunks = len(processed_chunks)
+
+        # Step 5: Complete
+        status_text.empty()
+        progress_bar.empty()
+
+        # Store results in session state
+        st.session_state.last_research = {
+            'query': research_query,
+            'documents': all_documents,
+            'timestamp': time.time(),
+            'web_results': web_results if search_web else None,
+            'news_results': news_results if search_news else None,
+            'books': all_books,
+            'num_extracted': num_extracted,
+            'num_chunks': num_chunks
+        }
+        st.session_state.pending_toast = "Research complete!"
+
+        # The other tabs and the sidebar depend on the new documents and
+        # research, so rerun the whole app rather than just this fragment
+        st.rerun(scope="app")
+
+    if 'last_research' in st.session_state:
+        render_research_results(st.session_state.last_research)
+
+def render_research_results(research: Dict):
+    """Show the results of the last research run"""
+    st.success(f"Research complete: {research['query']}")
+
+    # Step 1: Web Search
+    web_results = research.get('web_results')
+    if web_results is not None:
+        st.success(f"Found {len(web_results)} web results")
+
+        with st.expander("🌐 Web Search Results"):
+            for result in web_results[:5]:
+                st.write(f"**{result['title']}**")
+                st.write(f"🔗 {result['url']}")
+                st.write(f"📝 {result['snippet'][:200]}...")
+                st.divider()
+
+    # Step 2: News Search
+    news_results = research.get('news_results')
+    if news_results is not None:
+        st.success(f"Found {len(news_results)} news results")
+
+        with st.expander("📰 News Search Results"):
+            for result in news_results[:3]:
+                st.write(f"**{result['title']}**")
+                st.write(f"🔗 {result['url']}")
+                st.write(f"📅 {result.get('date', 'N/A')}")
+                st.write(f"📝 {result['snippet'][:200]}...")
+                st.divider()
+
+    # Step 2.5: Scriptures & Old Books Search
+    all_books = research.get('books', [])
+    if all_books:
+        st.success(f"Found {len(all_books)} scriptures/old books")
+        with st.expander("📚 Scriptures & Old Books Results"):
+            for book in all_books:
+                st.write(f"**{book['title']}** ({book['source']})")
+                st.write(book['content'][:500] + "...")
+                st.divider()
+
+    # Step 3: Extract Content
+    if research.get('num_extracted') is not None:
+        st.success(f"Successfully extracted content from {research['num_extracted']} URLs")
+
+    # Step 4: Generate Embeddings
+    if research.get('num_chunks') is not None:
+        st.success(f"Added {research['num_chunks']} document chunks to vector store")
+
+@st.fragment
+def render_upload_tab(services: Dict, vector_store: VectorStore):
+    """Tab 2: OCR uploaded PDFs/images and add them to the vector store"""
+    chunk_size = st.session_state.chunk_size
+
+    st.header("📄 Upload Files for Analysis")
+
+    uploaded_files = st.file_uploader(
+        "Upload PDFs or Images",
+        type=['pdf', 'png', 'jpg', 'jpeg'],
+        accept_multiple_files=True,
+        help="Upload PDF documents or images for OCR text extraction"
+    )
+
+    if uploaded_files:
+        if st.button("📝 Process Uploaded Files"):
+            progress_bar = st.progress(0)
+            status_text = st.empty()
+
+            # Process files
+            status_text.text("🔍 Processing uploaded files...")
+            extracted_docs = services['ocr'].process_uploaded_files(uploaded_files)
+
+            if extracted_docs:
+                progress_bar.progress(50)
+                status_text.text("🧠 Generating embeddings...")
+
+                # Generate embeddings for uploaded content
+                processed_chunks, embeddings = services['embeddings'].process_and_embed_documents(
+                    extracted_docs, chunk_size
+                )
+                embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+                if embeddings.size > 0:
+                    vector_store.add_documents(embeddings, processed_chunks)
+
+                status_text.empty()
+                progress_bar.empty()
+
+                st.session_state.last_upload = extracted_docs
+                st.session_state.pending_toast = "Files processed successfully!"
+
+                # Rerun the whole app so the other tabs and the sidebar see the new documents
+                st.rerun(scope="app")
+
+    if 'last_upload' in st.session_state:
+        extracted_docs = st.session_state.last_upload
+        st.success(f"Processed {len(extracted_docs)} files")
+
+        # Show extracted content preview
+        with st.expander("📄 Extracted Content Preview"):
+            for doc in extracted_docs:
+                st.write(f"**{doc['filename']}** ({doc['type']})")
+                st.write(f"📝 {doc['summary']}")
+                st.divider()
+
+@st.fragment
+def render_semantic_search_tab(services: Dict, vector_store: VectorStore):
+    """Tab 3: Semantic search over the vector store"""
+    st.header("🧠 Semantic Search")
+
+    if vector_store.get_stats()['num_documents'] == 0:
+        st.warning("No documents in vector store. Please research a topic or upload files first.")
+        return
+
+    search_query = st.text_input(
+        "Enter your search query:",
+        placeholder="e.g., What are the main benefits? How does it work? Recent developments"
+    )
+
+    num_results = st.slider("Number of results", 1, 10, 5)
+
+    if st.button("🔍 Search") and search_query:
+        # Generate query embedding
+        query_embedding = np.ascontiguousarray(services['embeddings'].generate_embeddings([search_query]), dtype=np.float32)
+
+        if query_embedding.size > 0:
+            # Search vector store
+            scores, doc_ids = vector_store.search_ids(query_embedding, num_results)
+
+            if len(doc_ids):
+                st.success(f"Found {len(doc_ids)} relevant results")
+
+                for i, (doc, score) in enumerate(zip(vector_store.get_documents(doc_ids), scores)):
+                    with st.expander(f"Result {i+1}: {doc['title'][:50]}... (Score: {score:.3f})"):
+                        st.write(f"**Title:** {doc['title']}")
+                        st.write(f"**URL:** {doc.get('url', 'N/A')}")
+                        st.write(f"**Content:**")
+                        st.write(doc['content'][:1000] + "..." if len(doc['content']) > 1000 else doc['content'])
+            else:
+                st.warning("No relevant results found.")
+
+@st.fragment
+def render_questions_tab(services: Dict, vector_store: VectorStore):
+    """Tab 4: Answer questions with Gemini using retrieved context"""
+    st.header("💬 Ask Questions About Your Research")
+
+    if vector_store.get_stats()['num_documents'] == 0:
+        st.warning("No research data available. Please research a topic or upload files first.")
+        return
+
+    question = st.text_area(
+        "Ask a question about your research:",
+        placeholder="e.g., What are the key findings? Summarize the main points. What are the pros and cons?"
+    )
+
+    if st.button("🤖 Get Answer") and question:
+        with st.spinner("🤔 Thinking..."):
+            # Find relevant context
+            query_embedding = np.ascontiguousarray(services['embeddings'].generate_embeddings([question]), dtype=np.float32)
+
+            if query_embedding.size > 0:
+                # Get relevant documents
+                _, doc_ids = vector_store.search_ids(query_embedding, 5)
+                context_documents = vector_store.get_documents(doc_ids)
+
+                # Generate answer using Gemini, streaming tokens as they arrive
+                st.write("### 🤖 AI Answer:")
+                st.write_stream(services['gemini'].answer_question_with_context_stream(
+                    question, context_documents
+                ))
+
+                # Show sources
+                if context_documents:
+                    with st.expander("📚 Sources Used"):
+                        for i, doc in enumerate(context_documents[:3]):
+                            st.write(f"**Source {i+1}:** {doc['title']}")
+                            st.write(f"🔗 {doc.get('url', 'N/A')}")
+                            st.write(f"📝 {doc['content'][:200]}...")
+                            st.divider()
+
+@st.fragment
+def render_summary_tab(services: Dict):
+    """Tab 5: Summarize the last research run"""
+    st.header("📋 Research Summary")
+
+    if 'last_research' not in st.session_state:
+        st.warning("No research data available. Please research a topic first.")
+        return
+
+    research_info = st.session_state.last_research
+    st.write(f"**Research Topic:** {research_info['query']}")
+    st.write(f"**Research Date:** {time.ctime(research_info['timestamp'])}")
+    st.write(f"**Documents Found:** {len(research_info.get('documents', []))}")
+
+    if st.button("📝 Generate Research Summary"):
+        with st.spinner("📝 Generating comprehensive summary..."):
+            # Get documents from the last research session
+            all_docs = research_info.get('documents', [])
+
+            if all_docs:
+                topic = research_info['query']
+                # Summary and follow-up questions are requested concurrently
+                summary, follow_ups = services['gemini'].summarize_with_follow_ups(all_docs, topic)
+
+                st.write("### 📋 Research Summary:")
+                st.write(summary)
+
+                # Show follow-up questions
+                st.write("### ❓ Suggested Follow-up Questions:")
+
+                if follow_ups:
+                    for i, question in enumerate(follow_ups, 1):
+                        st.write(f"{i}. {question}")
+            else:
+                st.warning("No documents available for summarization.")
+
+@st.fragment
+def render_corpus_tab(services: Dict, vector_store: VectorStore):
+    """Tab 6: Add scriptures & old books to the vector store"""
+    st.header("📚 Add Scriptures & Old Books")
+
+    option = st.radio("Choose source:", ["Project Gutenberg", "Internet Archive", "Upload Local Text"])
+
+    books = None
+    if option == "Project Gutenberg":
+        query = st.text_input("Enter book/scripture name", placeholder="e.g., Bhagavad Gita, Bible, Mahabharata")
+        if st.button("📖 Fetch from Gutenberg"):
+            books = cached_fetch(services['corpus'], 'fetch_from_gutenberg', query, 3)
+            message = f"Fetched {len(books)} books from Project Gutenberg"
+
+    elif option == "Internet Archive":
+        query = st.text_input("Enter book/scripture name", placeholder="e.g., Rigveda, Quran, Dead Sea Scrolls")
+        if st.button("📖 Fetch from Internet Archive"):
+            books = cached_fetch(services['corpus'], 'fetch_from_archive', query, 2)
+            message = f"Fetched {len(books)} books from Internet Archive"
+
+    elif option == "Upload Local Text":
+        uploaded_file = st.file_uploader("Upload .txt file", type=["txt"])
+        if uploaded_file and st.button("📖 Process Local File"):
+            books = [services['corpus'].load_local_text(uploaded_file)]
+            message = "File processed and added to vector store."
+
+    if books is not None:
+        if books:
+            # Add embeddings for all fetched books in one batch
+            chunks, embeddings = services['embeddings'].process_and_embed_documents(books, 1000)
+            embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+            vector_store.add_documents(embeddings, chunks)
+
+            st.session_state.last_corpus = {'message': message, 'books': books}
+
+            # Rerun the whole app so the other tabs and the sidebar see the new documents
+            st.rerun(scope="app")
+        else:
+            st.warning("No results found.")
+
+    if 'last_corpus' in st.session_state:
+        st.success(st.session_state.last_corpus['message'])
+        for book in st.session_state.last_corpus['books']:
+            st.write(f"### {book['title']}")
+            st.write(book['content'][:1000] + "...")
+
 def main():
     # Check if API key is provided
     if 'api_key' not in st.session_state or not st.session_state.api_key:
@@ -103,30 +569,26 @@ def main():
     # Initialize services with API key
     services = init_services(st.session_state.api_key)
 
-    # Initialize vector store in session state
-    if 'vector_store' not in st.session_state:
-        st.session_state.vector_store = VectorStore()
-        st.session_state.vector_store.load_from_session_state()
+    # Get the shared, disk-backed vector store
+    vector_store = get_vector_store()
+
+    # Report which SIMD build of FAISS is in use, once per session
+    if 'faiss_simd_reported' not in st.session_state:
+        st.session_state.faiss_simd_reported = True
+        simd_level = vector_store.get_stats()['simd_level']
+        if simd_level == 'GENERIC':
+            st.warning("FAISS was loaded without SIMD optimizations; vector search will be slower. "
+                       "Install a faiss-cpu wheel or build with FAISS_OPT_LEVEL=avx2/avx512.")
+        else:
+            st.info(f"FAISS SIMD level: {simd_level}")
+
+    # Toasts queued before a full rerun would be lost with it, so show them here
+    if 'pending_toast' in st.session_state:
+        st.toast(st.session_state.pop('pending_toast'), icon="✅")
 
     # Sidebar configuration
     with st.sidebar:
-        st.header("⚙️ Configuration")
-
-        # Research settings
-        st.subheader("🔧 Search Settings")
-        max_search_results = st.slider("Max search results", 5, 20, 10)
-        max_urls_to_parse = st.slider("Max URLs to parse", 3, 15, 5)
-        chunk_size = st.slider("Text chunk size", 500, 2000, 1000)
-
-        # Vector store stats
-        st.subheader("📊 Vector Store Stats")
-        stats = st.session_state.vector_store.get_stats()
-        st.metric("Documents", stats['num_documents'])
-        st.metric("Embedding Dimension", stats.get('dimension', 0))
-
-        if st.button("🗑️ Clear Vector Store"):
-            st.session_state.vector_store.clear()
-            st.rerun()
+        render_sidebar(vector_store)
     
     # Main tabs
     tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
@@ -138,362 +600,25 @@ def main():
         "📚 Scriptures & Old Books"
     ])
     
-    # Tab 1: Research Topic
+    # Each tab is its own fragment, so interacting with one tab does not
+    # rerun the others
     with tab1:
-        st.header("🔍 Research a Topic")
-        
-        research_query = st.text_input(
-            "Enter your research topic:",
-            placeholder="e.g., artificial intelligence in healthcare, climate change impacts, quantum computing"
-        )
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            search_web = st.checkbox("🌐 Web Search", value=True)
-            search_news = st.checkbox("📰 News Search", value=True)
-        
-        with col2:
-            extract_content = st.checkbox("📝 Extract Full Content", value=True)
-            generate_embeddings = st.checkbox("🧠 Generate Embeddings", value=True)
-        
-        if st.button("🚀 Start Research", type="primary"):
-            if not research_query:
-                st.error("Please enter a research topic!")
-                return
-            
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            all_documents = []
-
-            # Initialize results lists
-            web_results = []
-            news_results = []
-
-            # Step 1: Web Search
-            if search_web:
-                status_text.text("🔍 Searching the web...")
-                progress_bar.progress(10)
-                
-                web_results = services['search'].search_web(research_query, max_search_results)
-                st.success(f"Found {len(web_results)} web results")
-                
-                with st.expander("🌐 Web Search Results"):
-                    for result in web_results[:5]:
-                        st.write(f"**{result['title']}**")
-                        st.write(f"🔗 {result['url']}")
-                        st.write(f"📝 {result['snippet'][:200]}...")
-                        st.divider()
-            
-            # Step 2: News Search
-            if search_news:
-                status_text.text("📰 Searching news...")
-                progress_bar.progress(20)
-
-                news_results = services['search'].search_news(research_query, max_search_results//2)
-                st.success(f"Found {len(news_results)} news results")
-
-                with st.expander("📰 News Search Results"):
-                    for result in news_results[:3]:
-                        st.write(f"**{result['title']}**")
-                        st.write(f"🔗 {result['url']}")
-                        st.write(f"📅 {result.get('date', 'N/A')}")
-                        st.write(f"📝 {result['snippet'][:200]}...")
-                        st.divider()
-
-            # Step 2.5: Scriptures & Old Books Search
-            status_text.text("📚 Searching scriptures & old books...")
-            progress_bar.progress(30)
-
-            book_results = services['corpus'].fetch_from_gutenberg(research_query, max_results=2)
-            archive_results = services['corpus'].fetch_from_archive(research_query, max_results=1)
-
-            all_books = book_results + archive_results
-
-            if all_books:
-                st.success(f"Found {len(all_books)} scriptures/old books")
-                with st.expander("📚 Scriptures & Old Books Results"):
-                    for book in all_books:
-                        st.write(f"**{book['title']}** ({book['source']})")
-                        st.write(book['content'][:500] + "...")
-                        st.divider()
-
-                all_documents.extend(all_books)
-
-            # Step 3: Extract Content
-            if extract_content:
-                status_text.text("📝 Extracting content from URLs...")
-                progress_bar.progress(50)
-                
-                # Combine all URLs
-                all_urls = []
-                if search_web:
-                    all_urls.extend([r['url'] for r in web_results])
-                if search_news:
-                    all_urls.extend([r['url'] for r in news_results])
-                
-                # Extract content from top URLs
-                urls_to_extract = all_urls[:max_urls_to_parse]
-                
-                extraction_progress = st.empty()
-                
-                def progress_callback(current, total, url):
-                    extraction_progress.text(f"Extracting {current}/{total}: {url[:50]}...")
-                
-                extracted_docs = services['parser'].extract_multiple_urls(
-                    urls_to_extract, 
-                    progress_callback
-                )
-                
-                # Filter successful extractions
-                successful_docs = [doc for doc in extracted_docs if len(doc['content']) > 100]
-                all_documents.extend(successful_docs)
-                
-                st.success(f"Successfully extracted content from {len(successful_docs)} URLs")
-            
-            # Step 4: Generate Embeddings
-            if generate_embeddings and all_documents:
-                status_text.text("🧠 Generating embeddings...")
-                progress_bar.progress(80)
-                
-                # Process documents for embedding
-                processed_chunks = services['embeddings'].process_documents_for_embedding(
-                    all_documents, chunk_size
-                )
-                
-                if processed_chunks:
-                    # Generate embeddings
-                    texts = [chunk['content'] for chunk in processed_chunks]
-                    embeddings = services['embeddings'].generate_embeddings(texts)
-                    
-                    if embeddings.size > 0:
-                        # Add to vector store
-                        st.session_state.vector_store.add_documents(embeddings, processed_chunks)
-                        st.success(f"Added {len(processed_chunks)} document chunks to vector store")
-            
-            # Step 5: Complete
-            status_text.text("✅ Research complete!")
-            progress_bar.progress(100)
-            time.sleep(1)
-            status_text.empty()
-            progress_bar.empty()
-            
-            # Store results in session state
-            st.session_state.last_research = {
-                'query': research_query,
-                'documents': all_documents,
-                'timestamp': time.time()
-            }
+        render_research_tab(services, vector_store)
     
-    # Tab 2: Upload Files
     with tab2:
-        st.header("📄 Upload Files for Analysis")
-        
-        uploaded_files = st.file_uploader(
-            "Upload PDFs or Images",
-            type=['pdf', 'png', 'jpg', 'jpeg'],
-            accept_multiple_files=True,
-            help="Upload PDF documents or images for OCR text extraction"
-        )
-        
-        if uploaded_files:
-            if st.button("📝 Process Uploaded Files"):
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                # Process files
-                status_text.text("🔍 Processing uploaded files...")
-                extracted_docs = services['ocr'].process_uploaded_files(uploaded_files)
-                
-                if extracted_docs:
-                    progress_bar.progress(50)
-                    status_text.text("🧠 Generating embeddings...")
-                    
-                    # Generate embeddings for uploaded content
-                    processed_chunks = services['embeddings'].process_documents_for_embedding(
-                        extracted_docs, chunk_size
-                    )
-                    
-                    if processed_chunks:
-                        texts = [chunk['content'] for chunk in processed_chunks]
-                        embeddings = services['embeddings'].generate_embeddings(texts)
-                        
-                        if embeddings.size > 0:
-                            st.session_state.vector_store.add_documents(embeddings, processed_chunks)
-                    
-                    progress_bar.progress(100)
-                    status_text.text("✅ Files processed successfully!")
-                    
-                    st.success(f"Processed {len(extracted_docs)} files")
-                    
-                    # Show extracted content preview
-                    with st.expander("📄 Extracted Content Preview"):
-                        for doc in extracted_docs:
-                            st.write(f"**{doc['filename']}** ({doc['type']})")
-                            st.write(f"📝 {doc['summary']}")
-                            st.divider()
-                    
-                    time.sleep(2)
-                    status_text.empty()
-                    progress_bar.empty()
+        render_upload_tab(services, vector_store)
     
-    # Tab 3: Semantic Search
     with tab3:
-        st.header("🧠 Semantic Search")
-        
-        if st.session_state.vector_store.get_stats()['num_documents'] == 0:
-            st.warning("No documents in vector store. Please research a topic or upload files first.")
-            return
-        
-        search_query = st.text_input(
-            "Enter your search query:",
-            placeholder="e.g., What are the main benefits? How does it work? Recent developments"
-        )
-        
-        num_results = st.slider("Number of results", 1, 10, 5)
-        
-        if st.button("🔍 Search") and search_query:
-            # Generate query embedding
-            query_embedding = services['embeddings'].generate_embeddings([search_query])
-            
-            if query_embedding.size > 0:
-                # Search vector store
-                results = st.session_state.vector_store.search(query_embedding, num_results)
-                
-                if results:
-                    st.success(f"Found {len(results)} relevant results")
-                    
-                    for i, (doc, score) in enumerate(results):
-                        with st.expander(f"Result {i+1}: {doc['title'][:50]}... (Score: {score:.3f})"):
-                            st.write(f"**Title:** {doc['title']}")
-                            st.write(f"**URL:** {doc.get('url', 'N/A')}")
-                            st.write(f"**Content:**")
-                            st.write(doc['content'][:1000] + "..." if len(doc['content']) > 1000 else doc['content'])
-                else:
-                    st.warning("No relevant results found.")
+        render_semantic_search_tab(services, vector_store)
     
-    # Tab 4: Ask Questions
     with tab4:
-        st.header("💬 Ask Questions About Your Research")
-        
-        if st.session_state.vector_store.get_stats()['num_documents'] == 0:
-            st.warning("No research data available. Please research a topic or upload files first.")
-            return
-        
-        question = st.text_area(
-            "Ask a question about your research:",
-            placeholder="e.g., What are the key findings? Summarize the main points. What are the pros and cons?"
-        )
-        
-        if st.button("🤖 Get Answer") and question:
-            with st.spinner("🤔 Thinking..."):
-                # Find relevant context
-                query_embedding = services['embeddings'].generate_embeddings([question])
-                
-                if query_embedding.size > 0:
-                    # Get relevant documents
-                    relevant_docs = st.session_state.vector_store.search(query_embedding, 5)
-                    context_documents = [doc for doc, score in relevant_docs]
-                    
-                    # Generate answer using Gemini
-                    answer = services['gemini'].answer_question_with_context(
-                        question, context_documents
-                    )
-                    
-                    st.write("### 🤖 AI Answer:")
-                    st.write(answer)
-                    
-                    # Show sources
-                    if context_documents:
-                        with st.expander("📚 Sources Used"):
-                            for i, doc in enumerate(context_documents[:3]):
-                                st.write(f"**Source {i+1}:** {doc['title']}")
-                                st.write(f"🔗 {doc.get('url', 'N/A')}")
-                                st.write(f"📝 {doc['content'][:200]}...")
-                                st.divider()
+        render_questions_tab(services, vector_store)
     
-    # Tab 5: Research Summary
     with tab5:
-        st.header("📋 Research Summary")
-        
-        if 'last_research' not in st.session_state:
-            st.warning("No research data available. Please research a topic first.")
-            return
-        
-        research_info = st.session_state.last_research
-        st.write(f"**Research Topic:** {research_info['query']}")
-        st.write(f"**Research Date:** {time.ctime(research_info['timestamp'])}")
-        st.write(f"**Documents Found:** {len(research_info.get('documents', []))}")
-        
-        if st.button("📝 Generate Research Summary"):
-            with st.spinner("📝 Generating comprehensive summary..."):
-                # Get documents from the last research session
-                all_docs = research_info.get('documents', [])
-                
-                if all_docs:
-                    topic = research_info['query']
-                    summary = services['gemini'].summarize_research(all_docs, topic)
-                    
-                    st.write("### 📋 Research Summary:")
-                    st.write(summary)
-                    
-                    # Generate follow-up questions
-                    st.write("### ❓ Suggested Follow-up Questions:")
-                    follow_ups = services['gemini'].generate_follow_up_questions(topic, all_docs[:5])
-                    
-                    if follow_ups:
-                        for i, question in enumerate(follow_ups, 1):
-                            st.write(f"{i}. {question}")
-                else:
-                    st.warning("No documents available for summarization.")
+        render_summary_tab(services)
 
-    # Tab 6: Scriptures & Old Books
     with tab6:
-        st.header("📚 Add Scriptures & Old Books")
-
-        option = st.radio("Choose source:", ["Project Gutenberg", "Internet Archive", "Upload Local Text"])
-
-        if option == "Project Gutenberg":
-            query = st.text_input("Enter book/scripture name", placeholder="e.g., Bhagavad Gita, Bible, Mahabharata")
-            if st.button("📖 Fetch from Gutenberg"):
-                books = services['corpus'].fetch_from_gutenberg(query)
-                if books:
-                    st.success(f"Fetched {len(books)} books from Project Gutenberg")
-                    for book in books:
-                        st.write(f"### {book['title']}")
-                        st.write(book['content'][:1000] + "...")
-                        # Add embeddings
-                        chunks = services['embeddings'].process_documents_for_embedding([book], 1000)
-                        embeddings = services['embeddings'].generate_embeddings([c['content'] for c in chunks])
-                        st.session_state.vector_store.add_documents(embeddings, chunks)
-                else:
-                    st.warning("No results found.")
-
-        elif option == "Internet Archive":
-            query = st.text_input("Enter book/scripture name", placeholder="e.g., Rigveda, Quran, Dead Sea Scrolls")
-            if st.button("📖 Fetch from Internet Archive"):
-                books = services['corpus'].fetch_from_archive(query)
-                if books:
-                    st.success(f"Fetched {len(books)} books from Internet Archive")
-                    for book in books:
-                        st.write(f"### {book['title']}")
-                        st.write(book['content'][:1000] + "...")
-                        chunks = services['embeddings'].process_documents_for_embedding([book], 1000)
-                        embeddings = services['embeddings'].generate_embeddings([c['content'] for c in chunks])
-                        st.session_state.vector_store.add_documents(embeddings, chunks)
-                else:
-                    st.warning("No results found.")
-
-        elif option == "Upload Local Text":
-            uploaded_file = st.file_uploader("Upload .txt file", type=["txt"])
-            if uploaded_file and st.button("📖 Process Local File"):
-                book = services['corpus'].load_local_text(uploaded_file)
-                st.write(f"### {book['title']}")
-                st.write(book['content'][:1000] + "...")
-                chunks = services['embeddings'].process_documents_for_embedding([book], 1000)
-                embeddings = services['embeddings'].generate_embeddings([c['content'] for c in chunks])
-                st.session_state.vector_store.add_documents(embeddings, chunks)
-                st.success("File processed and added to vector store.")
+        render_corpus_tab(services, vector_store)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
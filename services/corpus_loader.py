@@ -1,8 +1,21 @@
 import os
+import re
 import requests
-from typing import List, Dict
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Optional, Tuple
+from html import unescape
 from bs4 import BeautifulSoup, Tag
 
+from services.logger import logger
+
+# Matches one entry of the Gutenberg search results list: book id and title
+_BOOKLINK_RE = re.compile(
+    rb'<li class="booklink".*?href="/ebooks/(\d+)".*?<span class="title">([^<]+)</span>',
+    re.DOTALL
+)
+
 class CorpusService:
     """
     Service to fetch and load scriptures, old books, and public domain texts
@@ -12,6 +25,17 @@ class CorpusService:
     def __init__(self):
         self.gutenberg_base = "https://www.gutenberg.org"
         self.archive_search = "https://archive.org/advancedsearch.php"
+        self.session = requests.Session()
+        # Retry transient failures with backoff instead of dropping the result
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
     def fetch_from_gutenberg(self, query: str, max_results: int = 3) -> List[Dict]:
         """
@@ -19,11 +43,51 @@ class CorpusService:
         Returns a list of dicts with 'title' and 'content'.
         """
         url = f"https://www.gutenberg.org/ebooks/search/?query={query}"
-        r = requests.get(url)
-        soup = BeautifulSoup(r.text, "html.parser")
+        try:
+            r = self.session.get(url, timeout=10)
+        except requests.RequestException as e:
+            logger.warning(f"Error searching Gutenberg: {e}")
+            return []
+        candidates = self._parse_gutenberg_results(r.content, max_results)
+        if not candidates:
+            return []
 
+        # Download all book texts concurrently; the work is network-bound
         books = []
-        for link in soup.select(".booklink")[:max_results]:
+        with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+            futures = [
+                executor.submit(self._download_gutenberg_text, title, text_url)
+                for title, text_url in candidates
+            ]
+            for future in as_completed(futures):
+                book = future.result()
+                if book:
+                    books.append(book)
+
+        return books
+
+    def _parse_gutenberg_results(self, html: bytes, max_results: int) -> List[Tuple[str, str]]:
+        """
+        Extract (title, text_url) pairs from a Gutenberg search results page.
+        Uses a precompiled regex over the raw bytes and falls back to a full
+        BeautifulSoup parse only if the regex finds nothing.
+        """
+        candidates: List[Tuple[str, str]] = []
+        for match in _BOOKLINK_RE.finditer(html):
+            book_id = match.group(1).decode()
+            title = unescape(match.group(2).decode("utf-8", errors="ignore")).strip()
+            candidates.append((title, f"{self.gutenberg_base}/files/{book_id}/{book_id}-0.txt"))
+            if len(candidates) >= max_results:
+                return candidates
+
+        if candidates:
+            return candidates
+
+        # Let lxml detect the encoding from the raw bytes
+        soup = BeautifulSoup(html, "lxml")
+        for link in soup.find_all(class_="booklink", limit=max_results):
+            if not isinstance(link, Tag):
+                continue
             title_elem = link.select_one(".title")
             a_elem = link.find("a")
             if not title_elem or not a_elem or not isinstance(a_elem, Tag):
@@ -34,16 +98,24 @@ class CorpusService:
                 continue
             book_id = href.split("/")[-1]
             text_url = f"{self.gutenberg_base}/files/{book_id}/{book_id}-0.txt"
+            candidates.append((title, text_url))
 
-            try:
-                txt = requests.get(text_url, timeout=10)
-                if txt.status_code == 200:
-                    content = txt.text[:50000]  # limit to first 50k chars
-                    books.append({"title": title, "content": content, "source": "Gutenberg"})
-            except:
-                continue
+        return candidates
 
-        return books
+    def _download_gutenberg_text(self, title: str, text_url: str) -> Optional[Dict]:
+        """
+        Download a single Gutenberg plain-text file.
+        Returns the book dict, or None if the download failed.
+        """
+        try:
+            txt = self.session.get(text_url, stream=True, timeout=10)
+            if txt.status_code == 200:
+                content = self._read_text_prefix(txt)
+                return {"title": title, "content": content, "source": "Gutenberg"}
+        except requests.RequestException as e:
+            # Includes ChunkedEncodingError from a connection reset mid-body
+            logger.warning(f"Error downloading {text_url}: {e}")
+        return None
 
     def fetch_from_archive(self, query: str, max_results: int = 2) -> List[Dict]:
         """
@@ -56,56 +128,100 @@ class CorpusService:
             "output": "json"
         }
         try:
-            r = requests.get(self.archive_search, params=params, timeout=10)
-            print(f"Archive search status: {r.status_code}")
+            r = self.session.get(self.archive_search, params=params, timeout=10)
             if r.status_code != 200:
                 return []
 
             data = r.json()
         except Exception as e:
-            print(f"Error fetching from archive: {e}")
+            logger.warning(f"Error fetching from archive: {e}")
             return []
         docs = data.get("response", {}).get("docs", [])
-        print(f"Archive docs count: {len(docs)}")
-        for doc in docs:
-            print(f"Doc: {doc.get('title', 'No title')} - identifier: {doc.get('identifier', 'No id')}")
+        if not docs:
+            return []
 
-        books = []
-        for doc in docs:
-            identifier = doc["identifier"]
-            title = doc["title"]
-
-            # Get metadata to find .txt file
-            metadata_url = f"https://archive.org/metadata/{identifier}"
-            try:
-                meta_r = requests.get(metadata_url, timeout=10)
-                if meta_r.status_code != 200:
-                    continue
-                meta = meta_r.json()
-                files = meta.get("files", [])
-                print(f"For {identifier}, files: {[f.get('name', '') for f in files]}")
-                txt_file = None
-                for f in files:
-                    name = f.get("name", "")
-                    if name.endswith(".txt"):
-                        txt_file = name
-                        break
-                print(f"For {identifier}, txt_file: {txt_file}")
-                if not txt_file:
-                    continue
-                url = f"https://archive.org/download/{identifier}/{txt_file}"
-                txt = requests.get(url, timeout=10)
-                if txt.status_code == 200:
-                    content = txt.text[:50000]
-                    books.append({"title": title, "content": content, "source": "Archive"})
-            except:
-                continue
+        with ThreadPoolExecutor(max_workers=len(docs)) as executor:
+            # Phase 1: fetch metadata for every result to find its .txt file
+            meta_futures = {
+                executor.submit(self._find_archive_txt_file, doc["identifier"]): doc
+                for doc in docs
+            }
+            downloads = []
+            for future in as_completed(meta_futures):
+                txt_file = future.result()
+                if txt_file:
+                    doc = meta_futures[future]
+                    downloads.append((doc["title"], doc["identifier"], txt_file))
+
+            # Phase 2: download all located text files
+            download_futures = [
+                executor.submit(self._download_archive_text, title, identifier, txt_file)
+                for title, identifier, txt_file in downloads
+            ]
+            books = []
+            for future in as_completed(download_futures):
+                book = future.result()
+                if book:
+                    books.append(book)
 
         return books
 
+    def _find_archive_txt_file(self, identifier: str) -> Optional[str]:
+        """
+        Look up an Internet Archive item's metadata and return the name
+        of its first .txt file, or None if there is none.
+        """
+        metadata_url = f"https://archive.org/metadata/{identifier}"
+        try:
+            meta_r = self.session.get(metadata_url, timeout=10)
+            if meta_r.status_code != 200:
+                return None
+            meta = meta_r.json()
+            for f in meta.get("files", []):
+                name = f.get("name", "")
+                if name.endswith(".txt"):
+                    return name
+        except (requests.RequestException, ValueError) as e:
+            # ValueError covers a metadata body that is not JSON
+            logger.warning(f"Error reading metadata for {identifier}: {e}")
+        return None
+
+    def _download_archive_text(self, title: str, identifier: str, txt_file: str) -> Optional[Dict]:
+        """
+        Download a single Internet Archive text file.
+        Returns the book dict, or None if the download failed.
+        """
+        url = f"https://archive.org/download/{identifier}/{txt_file}"
+        try:
+            txt = self.session.get(url, stream=True, timeout=10)
+            if txt.status_code == 200:
+                content = self._read_text_prefix(txt)
+                return {"title": title, "content": content, "source": "Archive"}
+        except requests.RequestException as e:
+            logger.warning(f"Error downloading {url}: {e}")
+        return None
+
+    def _read_text_prefix(self, resp) -> str:
+        """
+        Read a streamed response only until enough bytes are buffered for
+        the first 50k chars, then close it instead of pulling the whole book.
+        """
+        buf = bytearray()
+        try:
+            for chunk in resp.iter_content(chunk_size=8192, decode_unicode=False):
+                buf.extend(chunk)
+                if len(buf) >= 65536:
+                    break
+        finally:
+            resp.close()
+        # Decode only a 64 KiB byte prefix; that still holds at least 50k chars
+        # for mostly-ASCII text without materializing anything larger
+        prefix = memoryview(buf)[:65536]
+        return str(prefix, "utf-8", errors="ignore")[:50000]  # limit to first 50k chars
+
     def load_local_text(self, file) -> Dict:
         """
         Load text from a local uploaded file (.txt only here).
         """
-        content = file.read().decode("utf-8", errors="ignore")
+        content = file.read(65536).decode("utf-8", errors="ignore")[:50000]
         return {"title": file.name, "content": content, "source": "Local"}
@@ -8,6 +8,8 @@ class DDGSearchService:
     
     def __init__(self, max_results: int = 10):
         self.max_results = max_results
+        # Reuse one client across searches instead of reconnecting per call
+        self.ddgs = DDGS()
     
     def search_web(self, query: str, max_results: Optional[int] = None) -> List[Dict[str, str]]:
         """
@@ -24,19 +26,17 @@ class DDGSearchService:
             results_limit = max_results or self.max_results
 
             # Perform search with rate limiting
-            results = []
-            with DDGS() as ddgs:
-                search_results = ddgs.text(query, max_results=results_limit)
+            search_results = self.ddgs.text(query, max_results=results_limit)
 
-            for result in search_results:
-                results.append({
+            return [
+                {
                     'title': result.get('title', ''),
                     'url': result.get('href', ''),
                     'snippet': result.get('body', ''),
                     'source': 'DuckDuckGo'
-                })
-
-            return results
+                }
+                for result in search_results
+            ]
 
         except Exception as e:
             st.error(f"Error performing web search: {str(e)}")
@@ -56,20 +56,18 @@ class DDGSearchService:
         try:
             results_limit = max_results or self.max_results
 
-            results = []
-            with DDGS() as ddgs:
-                news_results = ddgs.news(query, max_results=results_limit)
+            news_results = self.ddgs.news(query, max_results=results_limit)
 
-            for result in news_results:
-                results.append({
+            return [
+                {
                     'title': result.get('title', ''),
                     'url': result.get('url', ''),
                     'snippet': result.get('body', ''),
                     'date': result.get('date', ''),
                     'source': result.get('source', 'News')
-                })
-
-            return results
+                }
+                for result in news_results
+            ]
 
         except Exception as e:
             st.error(f"Error performing news search: {str(e)}")
@@ -1,39 +1,80 @@
+import os
+
+# Let the BLAS/OpenMP backends use every core unless the deployment says otherwise;
+# these must be set before torch is imported
+os.environ.setdefault('OMP_NUM_THREADS', str(os.cpu_count() or 1))
+os.environ.setdefault('MKL_NUM_THREADS', str(os.cpu_count() or 1))
+
 import streamlit as st
 from sentence_transformers import SentenceTransformer
 import numpy as np
-from typing import List, Union
+import re
+import bisect
+from typing import List, Tuple, Union
 import torch
 
+# Characters that end a sentence when picking chunk boundaries
+_SENTENCE_END_RE = re.compile(r'[.!?]')
+
+# Rough English characters-per-token ratio used to convert character chunk sizes
+CHARS_PER_TOKEN = 4
+
+@st.cache_resource(show_spinner=False)
+def _get_st_model(model_name: str, use_onnx: bool = False) -> SentenceTransformer:
+    """Load a sentence transformer model once per process"""
+    if use_onnx:
+        return SentenceTransformer(model_name, backend="onnx")
+    
+    model = SentenceTransformer(model_name)
+    # Half precision on GPU halves weight/activation bandwidth
+    # and enables tensor-core matmuls
+    if torch.cuda.is_available():
+        model = model.to('cuda').half()
+    return model
+
 class EmbeddingService:
     """Service for generating text embeddings"""
     
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", use_onnx: bool = False):
         """
         Initialize the embedding service
         
         Args:
             model_name: Name of the sentence transformer model to use
+            use_onnx: Run the model with the ONNX Runtime backend instead of PyTorch
+                (requires sentence-transformers[onnx])
         """
         self.model_name = model_name
+        self.use_onnx = use_onnx
         self.model = None
         self._load_model()
     
     def _load_model(self):
         """Load the sentence transformer model"""
+        if not torch.cuda.is_available():
+            # CPU-only: make sure intra-op matmuls use all cores
+            torch.set_num_threads(max(1, os.cpu_count() or 1))
+            try:
+                torch.set_num_interop_threads(2)
+            except RuntimeError:
+                # Can only be set once, before any inter-op work has started
+                pass
+        
         try:
             with st.spinner(f"Loading embedding model: {self.model_name}..."):
-                self.model = SentenceTransformer(self.model_name)
+                self.model = _get_st_model(self.model_name, self.use_onnx)
             st.success("Embedding model loaded successfully!")
         except Exception as e:
             st.error(f"Error loading embedding model: {str(e)}")
             self.model = None
     
-    def generate_embeddings(self, texts: Union[str, List[str]]) -> np.ndarray:
+    def generate_embeddings(self, texts: Union[str, List[str]], batch_size: int = 64) -> np.ndarray:
         """
         Generate embeddings for text(s)
         
         Args:
             texts: Single text string or list of text strings
+            batch_size: Number of texts encoded per forward pass
             
         Returns:
             Numpy array of embeddings
@@ -46,8 +87,22 @@ class EmbeddingService:
             if isinstance(texts, str):
                 texts = [texts]
             
-            # Generate embeddings
-            embeddings = self.model.encode(texts, convert_to_numpy=True)
+            # Sort by length so each batch pads to similar-length inputs
+            order = np.argsort([len(text) for text in texts], kind='stable')
+            sorted_texts = [texts[i] for i in order]
+            
+            # Generate unit-length embeddings so documents and queries are comparable
+            sorted_embeddings = self.model.encode(
+                sorted_texts,
+                batch_size=batch_size,
+                convert_to_numpy=True,
+                show_progress_bar=False,
+                normalize_embeddings=True
+            )
+            
+            # Restore the caller's order
+            embeddings = np.empty_like(sorted_embeddings)
+            embeddings[order] = sorted_embeddings
             return embeddings
             
         except Exception as e:
@@ -58,6 +113,64 @@ class EmbeddingService:
         """
         Split text into chunks for embedding
         
+        When the model's fast tokenizer is available, chunks are cut in token
+        space so each one fits the encoder's max sequence length and nothing
+        is silently truncated at encode time. Character sizes are converted
+        at ~4 chars/token. Otherwise falls back to character chunking.
+        
+        Args:
+            text: Text to chunk
+            chunk_size: Size of each chunk in characters
+            overlap: Number of characters to overlap between chunks
+            
+        Returns:
+            List of text chunks
+        """
+        tokenizer = getattr(self.model, 'tokenizer', None)
+        if tokenizer is not None and getattr(tokenizer, 'is_fast', False):
+            max_tokens = min(self.model.get_max_seq_length() - 2, chunk_size // CHARS_PER_TOKEN)
+            return self.chunk_text_by_tokens(text, max_tokens, overlap // CHARS_PER_TOKEN)
+        
+        return self.chunk_text_by_chars(text, chunk_size, overlap)
+    
+    def chunk_text_by_tokens(self, text: str, max_tokens: int, overlap_tokens: int = 50) -> List[str]:
+        """
+        Split text into windows of at most max_tokens model tokens
+        
+        Args:
+            text: Text to chunk
+            max_tokens: Maximum number of tokens per chunk
+            overlap_tokens: Number of tokens to overlap between chunks
+            
+        Returns:
+            List of text chunks, sliced from the original text via token offsets
+        """
+        encoding = self.model.tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+        )
+        offsets = encoding['offset_mapping']
+        num_tokens = len(offsets)
+        
+        if num_tokens <= max_tokens:
+            return [text]
+        
+        chunks = []
+        step = max(1, max_tokens - overlap_tokens)
+        
+        for start in range(0, num_tokens, step):
+            end = min(start + max_tokens, num_tokens)
+            chunk = text[offsets[start][0]:offsets[end - 1][1]].strip()
+            if chunk:
+                chunks.append(chunk)
+            if end == num_tokens:
+                break
+        
+        return chunks
+    
+    def chunk_text_by_chars(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
+        """
+        Split text into character chunks, preferring sentence boundaries
+        
         Args:
             text: Text to chunk
             chunk_size: Size of each chunk in characters
@@ -66,31 +179,33 @@ class EmbeddingService:
         Returns:
             List of text chunks
         """
-        if len(text) <= chunk_size:
+        n = len(text)
+        if n <= chunk_size:
             return [text]
         
         chunks = []
         start = 0
+        half = chunk_size // 2
+        
+        # Offsets just past every sentence ending, found in one regex pass
+        boundaries = [m.end() for m in _SENTENCE_END_RE.finditer(text)]
         
-        while start < len(text):
+        while start < n:
             end = start + chunk_size
             
             # Try to end at a sentence boundary
-            if end < len(text):
-                # Look for sentence endings near the chunk boundary
-                for i in range(end, max(start + chunk_size // 2, end - 100), -1):
-                    if text[i] in '.!?':
-                        end = i + 1
-                        break
+            if end < n:
+                # Use the last sentence ending near the chunk boundary
+                lookback_limit = max(start + half, end - 100)
+                idx = bisect.bisect_right(boundaries, end + 1)
+                if idx and boundaries[idx - 1] > lookback_limit + 1:
+                    end = boundaries[idx - 1]
             
             chunk = text[start:end].strip()
             if chunk:
                 chunks.append(chunk)
             
             start = end - overlap
-            
-            if start >= len(text):
-                break
         
         return chunks
     
@@ -132,4 +247,26 @@ class EmbeddingService:
                 }
                 processed_chunks.append(chunk_doc)
         
-        return processed_chunks
\ No newline at end of file
+        return processed_chunks
+    
+    def process_and_embed_documents(self, documents: List[dict], chunk_size: int = 1000,
+                                    batch_size: int = 64) -> Tuple[List[dict], np.ndarray]:
+        """
+        Chunk documents and embed every chunk in a single batched encode call
+        
+        Args:
+            documents: List of document dictionaries
+            chunk_size: Size of chunks for long documents
+            batch_size: Number of chunks encoded per forward pass
+            
+        Returns:
+            Tuple of (processed chunks with metadata, embeddings with one row per chunk)
+        """
+        processed_chunks = self.process_documents_for_embedding(documents, chunk_size)
+        if not processed_chunks:
+            return [], np.array([])
+        
+        texts = [chunk['content'] for chunk in processed_chunks]
+        embeddings = self.generate_embeddings(texts, batch_size=batch_size)
+        
+        return processed_chunks, embeddings
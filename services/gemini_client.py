@@ -1,9 +1,64 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import google.generativeai as genai
 import os
-from typing import List, Dict, Optional
+import hashlib
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Iterator, List, Dict, Optional, Tuple
 import time
 
+from services.logger import logger
+
+# Prompt token budget, kept safely under gemini-2.5-flash's ~1M-token input window
+CONTEXT_TOKEN_BUDGET = 900_000
+# Rough characters-per-token ratio for estimating prompt size without an API call
+CHARS_PER_TOKEN = 4
+
+# Model used for every request and for context caches
+GEMINI_MODEL = 'gemini-2.5-flash'
+
+# How long a cached research context stays on the server
+CONTEXT_CACHE_TTL = timedelta(minutes=10)
+# Smallest context the API accepts for explicit caching
+CONTEXT_CACHE_MIN_TOKENS = 1024
+# Smallest estimated context we try to cache; the CHARS_PER_TOKEN estimate can
+# be well off, so stay clear of the API minimum instead of failing at the server
+CONTEXT_CACHE_MIN_ESTIMATED_TOKENS = 2 * CONTEXT_CACHE_MIN_TOKENS
+
+# Leading list marker of a follow-up question line ("1.", "2)" or "-")
+_LIST_RE = re.compile(r'^\s*(?:\d+[\.\)]|-)\s*')
+
+SAFETY_SETTINGS = [
+    {
+        "category": "HARM_CATEGORY_HARASSMENT",
+        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+    },
+    {
+        "category": "HARM_CATEGORY_HATE_SPEECH",
+        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+    },
+    {
+        "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+    },
+    {
+        "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
+        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
+    }
+]
+
+@st.cache_resource(show_spinner=False)
+def _get_gemini_model(api_key: str, model_name: str = GEMINI_MODEL):
+    """Configure the Gemini API and build the generative model once per key"""
+    # Configure the API key
+    genai.configure(api_key=api_key)  # type: ignore
+
+    # Initialize the model
+    return genai.GenerativeModel(model_name, safety_settings=SAFETY_SETTINGS)  # type: ignore
+
 class GeminiClient:
     """Client for interacting with Gemini 2.5 Flash LLM"""
     
@@ -16,6 +71,12 @@ class GeminiClient:
         """
         self.api_key = api_key or os.getenv('GOOGLE_API_KEY')
         self.model = None
+        # Server-side context caches: context hash -> (cached model, expiry time)
+        # Context hash -> (cached-context model, or None if creating it failed; expiry)
+        self._context_caches: Dict[str, Tuple[Optional[genai.GenerativeModel], float]] = {}
+        # Guards the dict above; each cache is created under its own key lock
+        self._cache_lock = threading.Lock()
+        self._cache_key_locks: Dict[str, threading.Lock] = {}
         self._initialize_client()
     
     def _initialize_client(self):
@@ -25,31 +86,7 @@ class GeminiClient:
                 st.error("Google API key not found! Please set GOOGLE_API_KEY in .env file")
                 return
             
-            # Configure the API key
-            genai.configure(api_key=self.api_key)  # type: ignore
-
-            # Initialize the model
-            self.model = genai.GenerativeModel(  # type: ignore
-                'gemini-2.5-flash',
-                safety_settings=[
-                    {
-                        "category": "HARM_CATEGORY_HARASSMENT",
-                        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                    },
-                    {
-                        "category": "HARM_CATEGORY_HATE_SPEECH",
-                        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                    },
-                    {
-                        "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                    },
-                    {
-                        "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                        "threshold": "BLOCK_MEDIUM_AND_ABOVE"
-                    }
-                ]
-            )
+            self.model = _get_gemini_model(self.api_key)
             
             st.success("Gemini client initialized successfully!")
             
@@ -57,51 +94,236 @@ class GeminiClient:
             st.error(f"Error initializing Gemini client: {str(e)}")
             self.model = None
     
-    def generate_response(self, prompt: str, max_tokens: int = 1000) -> str:
+    def generate_response_stream(self, prompt: str, max_tokens: int = 1000,
+                                 model: Optional[genai.GenerativeModel] = None) -> Iterator[str]:
         """
-        Generate response using Gemini model
+        Generate a response using Gemini model, yielding text as it arrives
         
         Args:
             prompt: Input prompt
             max_tokens: Maximum tokens in response
+            model: Optional model bound to a cached context, used instead of self.model
             
-        Returns:
-            Generated response text
+        Yields:
+            Chunks of generated response text
         """
-        if not self.model:
-            return "Error: Gemini model not initialized"
+        model = model or self.model
+        if not model:
+            yield "Error: Gemini model not initialized"
+            return
         
         try:
-            # Generate response
-            response = self.model.generate_content(prompt)
-            
-            if response.text:
-                return response.text
-            else:
-                return "No response generated"
+            # Stream the response so the first tokens can be shown right away
+            for chunk in model.generate_content(prompt, stream=True):
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunk carried no text (e.g. only safety metadata)
+                    continue
+                if text:
+                    yield text
                 
         except Exception as e:
             st.error(f"Error generating response: {str(e)}")
-            return f"Error: {str(e)}"
+            yield f"Error: {str(e)}"
     
-    def answer_question_with_context(self, question: str, context_documents: List[Dict], max_context_length: int = 4000) -> str:
+    def generate_response(self, prompt: str, max_tokens: int = 1000,
+                          model: Optional[genai.GenerativeModel] = None) -> str:
+        """
+        Generate response using Gemini model
+        
+        Args:
+            prompt: Input prompt
+            max_tokens: Maximum tokens in response
+            model: Optional model bound to a cached context, used instead of self.model
+            
+        Returns:
+            Generated response text
+        """
+        response = "".join(self.generate_response_stream(prompt, max_tokens=max_tokens, model=model))
+        return response or "No response generated"
+    
+    def answer_question_with_context(self, question: str, context_documents: List[Dict],
+                                     max_context_tokens: int = CONTEXT_TOKEN_BUDGET) -> str:
         """
         Answer a question using provided context documents
         
         Args:
             question: User question
             context_documents: List of relevant document chunks
-            max_context_length: Maximum length of context to include
+            max_context_tokens: Token budget for prompt context plus the response
             
         Returns:
             Generated answer
         """
+        prompt = self._build_question_prompt(question, context_documents, max_context_tokens)
+        return self.generate_response(prompt, max_tokens=1500)
+    
+    def answer_question_with_context_stream(self, question: str, context_documents: List[Dict],
+                                            max_context_tokens: int = CONTEXT_TOKEN_BUDGET) -> Iterator[str]:
+        """
+        Answer a question using provided context documents, streaming the answer
+        
+        Args:
+            question: User question
+            context_documents: List of relevant document chunks
+            max_context_tokens: Token budget for prompt context plus the response
+            
+        Yields:
+            Chunks of the generated answer
+        """
+        prompt = self._build_question_prompt(question, context_documents, max_context_tokens)
+        return self.generate_response_stream(prompt, max_tokens=1500)
+    
+    def _build_question_prompt(self, question: str, context_documents: List[Dict],
+                               max_context_tokens: int) -> str:
+        """
+        Build the question-answering prompt from context documents
+        
+        Args:
+            question: User question
+            context_documents: List of relevant document chunks
+            max_context_tokens: Token budget for prompt context plus the response
+            
+        Returns:
+            Prompt text
+        """
         if not context_documents:
-            return self.generate_response(f"Question: {question}")
+            return f"Question: {question}"
         
-        # Build context from documents
+        context = self._build_question_context(context_documents, max_context_tokens)
+        return f"{context}\n\n{self._build_question_suffix(question)}"
+    
+    def _get_cached_context_model(self, context: str) -> Optional[genai.GenerativeModel]:
+        """
+        Get a model bound to a server-side cache of the given context
+        
+        The context is uploaded once with a CONTEXT_CACHE_TTL lifetime, so
+        later requests over the same research sources skip re-processing it.
+        
+        Args:
+            context: Context prefix shared by several prompts
+            
+        Returns:
+            Cached-context model, or None if the context is too small to
+            cache or caching it failed within the last CONTEXT_CACHE_TTL
+        """
+        if not self.model or len(context) // CHARS_PER_TOKEN < CONTEXT_CACHE_MIN_ESTIMATED_TOKENS:
+            return None
+        
+        key = hashlib.sha256(context.encode('utf-8')).hexdigest()
+        
+        with self._cache_lock:
+            # Forget caches the server has already expired
+            now = time.monotonic()
+            self._context_caches = {
+                k: entry for k, entry in self._context_caches.items() if entry[1] > now
+            }
+            if key in self._context_caches:
+                return self._context_caches[key][0]
+            key_lock = self._cache_key_locks.setdefault(key, threading.Lock())
+        
+        # The blocking create runs under this key's lock only, so concurrent
+        # requests for the same sources share one cache without holding up
+        # requests for other contexts
+        with key_lock:
+            with self._cache_lock:
+                if key in self._context_caches:
+                    return self._context_caches[key][0]
+            
+            try:
+                cache = genai.caching.CachedContent.create(  # type: ignore
+                    model=f"models/{GEMINI_MODEL}",
+                    contents=[context],
+                    ttl=CONTEXT_CACHE_TTL
+                )
+                model = genai.GenerativeModel.from_cached_content(  # type: ignore
+                    cache, safety_settings=SAFETY_SETTINGS
+                )
+            except Exception as e:
+                # Caching is only an optimization; send the full prompt instead,
+                # and remember the failure so later requests skip the round trip
+                logger.warning(f"Gemini context caching failed, sending full prompts: {str(e)}")
+                model = None
+            
+            with self._cache_lock:
+                # Expire our handle slightly early so it is never used after the server drops it
+                expiry = time.monotonic() + CONTEXT_CACHE_TTL.total_seconds() - 30
+                self._context_caches[key] = (model, expiry)
+                self._cache_key_locks.pop(key, None)
+        
+        return model
+    
+    def _generate_with_sources(self, documents: List[Dict], instructions: str, max_tokens: int) -> str:
+        """
+        Generate a response about the research sources, reusing their cached context
+        
+        Args:
+            documents: List of research documents
+            instructions: Task-specific part of the prompt
+            max_tokens: Maximum tokens in response
+            
+        Returns:
+            Generated response text
+        """
+        context = self._build_sources_context(documents)
+        model = self._get_cached_context_model(context)
+        if model is not None:
+            return self.generate_response(instructions, max_tokens=max_tokens, model=model)
+        
+        return self.generate_response(f"{context}\n\n{instructions}", max_tokens=max_tokens)
+    
+    def _build_sources_context(self, documents: List[Dict]) -> str:
+        """
+        Build the research sources block shared by the summary and follow-up prompts
+        
+        Args:
+            documents: List of research documents
+            
+        Returns:
+            Sources context text
+        """
+        # Extract key information from documents
+        doc_summaries = []
+        for doc in documents[:10]:  # Limit to top 10 documents
+            title = doc.get('title', 'Untitled')
+            content = doc.get('content', '')
+            url = doc.get('url', '')
+            
+            # Truncate content if too long
+            if len(content) > 500:
+                content = content[:500] + "..."
+            
+            summary = f"**{title}**"
+            if url:
+                summary += f" ({url})"
+            summary += f"\n{content}"
+            
+            doc_summaries.append(summary)
+        
+        combined_content = "\n\n---\n\n".join(doc_summaries)
+        
+        return f"""RESEARCH SOURCES:
+
+{combined_content}"""
+    
+    def _build_question_context(self, context_documents: List[Dict],
+                                max_context_tokens: int, max_tokens: int = 1500) -> str:
+        """
+        Build the research context prefix of the question-answering prompt
+        
+        Args:
+            context_documents: List of relevant document chunks
+            max_context_tokens: Token budget for prompt context plus the response
+            max_tokens: Tokens reserved for the response
+            
+        Returns:
+            Context prefix text
+        """
+        # Build context from documents until the token budget is used up;
+        # tokens are estimated locally to avoid a count_tokens call per document
         context_parts = []
-        current_length = 0
+        remaining_tokens = max_context_tokens - max_tokens
         
         for doc in context_documents:
             content = doc.get('content', '')
@@ -113,26 +335,36 @@ class GeminiClient:
                 doc_text += f" ({url})"
             doc_text += f"\nContent: {content}\n"
             
-            if current_length + len(doc_text) > max_context_length:
+            doc_tokens = len(doc_text) // CHARS_PER_TOKEN
+            if doc_tokens > remaining_tokens:
                 break
             
             context_parts.append(doc_text)
-            current_length += len(doc_text)
+            remaining_tokens -= doc_tokens
         
         context = "\n---\n".join(context_parts)
         
-        # Create comprehensive prompt
-        prompt = f"""Based on the following research context, please answer the user's question. 
+        return f"""Based on the following research context, please answer the user's question. 
 Provide a comprehensive, accurate answer and cite the relevant sources when possible.
 
 RESEARCH CONTEXT:
-{context}
-
-QUESTION: {question}
+{context}"""
+    
+    def _build_question_suffix(self, question: str) -> str:
+        """
+        Build the question part of the question-answering prompt
+        
+        Args:
+            question: User question
+            
+        Returns:
+            Question prompt text
+        """
+        prompt = f"""QUESTION: {question}
 
 Please provide a detailed answer based on the context above. If the context doesn't contain enough information to fully answer the question, please indicate what information is missing and provide what insights you can based on the available context."""
         
-        return self.generate_response(prompt, max_tokens=1500)
+        return prompt
     
     def summarize_research(self, documents: List[Dict], topic: str) -> str:
         """
@@ -148,29 +380,19 @@ Please provide a detailed answer based on the context above. If the context does
         if not documents:
             return "No documents provided for summarization."
         
-        # Extract key information from documents
-        doc_summaries = []
-        for doc in documents[:10]:  # Limit to top 10 documents
-            title = doc.get('title', 'Untitled')
-            content = doc.get('content', '')
-            url = doc.get('url', '')
-            
-            # Truncate content if too long
-            if len(content) > 500:
-                content = content[:500] + "..."
-            
-            summary = f"**{title}**"
-            if url:
-                summary += f" ({url})"
-            summary += f"\n{content}"
-            
-            doc_summaries.append(summary)
-        
-        combined_content = "\n\n---\n\n".join(doc_summaries)
+        return self._generate_with_sources(documents, self._build_summary_prompt(topic), max_tokens=2000)
+    
+    def _build_summary_prompt(self, topic: str) -> str:
+        """
+        Build the research summary instructions that follow the sources block
         
-        prompt = f"""Please create a comprehensive research summary about "{topic}" based on the following sources:
-
-{combined_content}
+        Args:
+            topic: Research topic
+            
+        Returns:
+            Prompt text
+        """
+        prompt = f"""Please create a comprehensive research summary about "{topic}" based on the research sources above.
 
 Please provide:
 1. An executive summary of the key findings
@@ -181,7 +403,7 @@ Please provide:
 
 Format the response in a clear, well-structured manner."""
         
-        return self.generate_response(prompt, max_tokens=2000)
+        return prompt
     
     def generate_follow_up_questions(self, topic: str, documents: List[Dict]) -> List[str]:
         """
@@ -197,20 +419,45 @@ Format the response in a clear, well-structured manner."""
         if not documents:
             return []
         
-        # Create summary of key points from documents
-        doc_summaries = []
-        for doc in documents[:5]:  # Limit to top 5 documents
-            title = doc.get('title', 'Untitled')
-            content = doc.get('content', '')[:300] + "..."  # Truncate for brevity
-            doc_summaries.append(f"- {title}: {content}")
+        response = self._generate_with_sources(documents, self._build_follow_up_prompt(topic), max_tokens=500)
+        return self._parse_follow_up_questions(response)
+    
+    def summarize_with_follow_ups(self, documents: List[Dict], topic: str) -> Tuple[str, List[str]]:
+        """
+        Generate the research summary and follow-up questions concurrently
+        
+        Args:
+            documents: List of research documents
+            topic: Research topic
+            
+        Returns:
+            Tuple of (research summary, follow-up questions)
+        """
+        # Both requests are blocking network calls; issue them side by side.
+        # Workers need the script run context to render st.error
+        ctx = get_script_run_ctx()
+        with ThreadPoolExecutor(
+            max_workers=2,
+            initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)
+        ) as executor:
+            summary_future = executor.submit(self.summarize_research, documents, topic)
+            questions_future = executor.submit(self.generate_follow_up_questions, topic, documents)
+            summary, questions = summary_future.result(), questions_future.result()
         
-        combined_summaries = "\n".join(doc_summaries)
+        return summary, questions
+    
+    def _build_follow_up_prompt(self, topic: str) -> str:
+        """
+        Build the follow-up questions instructions that follow the sources block
         
-        prompt = f"""Based on the research about "{topic}" and the following key findings:
-
-{combined_summaries}
-
-Generate 5 relevant follow-up questions that would help deepen understanding of this topic. 
+        Args:
+            topic: Research topic
+            
+        Returns:
+            Prompt text
+        """
+        prompt = f"""Based on the research about "{topic}" and the research sources above,
+generate 5 relevant follow-up questions that would help deepen understanding of this topic. 
 The questions should be:
 1. Specific and actionable
 2. Build upon the existing research
@@ -219,19 +466,27 @@ The questions should be:
 
 Format as a numbered list:"""
         
-        response = self.generate_response(prompt, max_tokens=500)
+        return prompt
+    
+    def _parse_follow_up_questions(self, response: str) -> List[str]:
+        """
+        Parse follow-up questions out of a numbered-list response
         
+        Args:
+            response: Model response text
+            
+        Returns:
+            Up to 5 questions
+        """
         # Parse questions from response
         questions = []
-        lines = response.split('\n')
-        
-        for line in lines:
-            line = line.strip()
-            if line and (line[0].isdigit() or line.startswith('-')):
-                # Remove numbering and clean up
-                question = line.split('.', 1)[-1].strip()
-                question = line.split('-', 1)[-1].strip() if '-' in line else question
-                if question and question.endswith('?'):
-                    questions.append(question)
-        
-        return questions[:5]
\ No newline at end of file
+        
+        for line in response.splitlines():
+            # Only strip the list marker, so hyphens inside a question survive
+            question = _LIST_RE.sub('', line).strip()
+            if question.endswith('?'):
+                questions.append(question)
+                if len(questions) == 5:
+                    break
+        
+        return questions
\ No newline at end of file
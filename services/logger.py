@@ -1,4 +1,7 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 from pathlib import Path
 
@@ -6,6 +9,9 @@ def setup_logger(name: str = "deep_research_assistant", level: int = logging.INF
     """
     Set up a logger with console and file output.
 
+    Records are put on a queue and written by a single background
+    listener thread, so logging calls never block on console or disk I/O.
+
     Args:
         name: Logger name
         level: Logging level
@@ -24,10 +30,12 @@ def setup_logger(name: str = "deep_research_assistant", level: int = logging.INF
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(level)
 
-    # File handler
+    # File handler, rotated at 10 MB and opened only on the first record
     log_file = Path("logs/app.log")
     log_file.parent.mkdir(exist_ok=True)
-    file_handler = logging.FileHandler(log_file)
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=10_000_000, backupCount=3, delay=True
+    )
     file_handler.setLevel(level)
 
     # Formatter
@@ -37,9 +45,15 @@ def setup_logger(name: str = "deep_research_assistant", level: int = logging.INF
     console_handler.setFormatter(formatter)
     file_handler.setFormatter(formatter)
 
-    # Add handlers
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    # Hand records to a background listener that owns the real handlers
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
 
     return logger
 
@@ -1,18 +1,37 @@
 import streamlit as st
 from PIL import Image
 import easyocr
+import numpy as np
 from pdf2image import convert_from_bytes, convert_from_path
+import pypdf
 import io
 import tempfile
 import os
 from typing import List, Optional, Union, Any, Tuple, cast
 
+# Rasterize pages on several poppler threads, as grayscale JPEGs: OCR
+# only needs luminance, and JPEG is cheaper to materialize than PPM
+PDF_RASTER_OPTIONS = {
+    'thread_count': min(8, os.cpu_count() or 1),
+    'fmt': 'jpeg',
+    'grayscale': True
+}
+
+# Average characters per page below which a PDF's text layer is treated
+# as missing and the pages are OCR'd instead
+MIN_TEXT_LAYER_CHARS_PER_PAGE = 50
+
+@st.cache_resource(show_spinner=False)
+def _get_ocr_reader(languages: Tuple[str, ...] = ('en',)) -> easyocr.Reader:
+    """Load an EasyOCR reader once per process"""
+    return easyocr.Reader(list(languages))
+
 class OCRService:
     """Service for OCR operations on PDFs and images"""
     
     def __init__(self):
         # Initialize EasyOCR reader
-        self.reader = easyocr.Reader(['en'])
+        self.reader = _get_ocr_reader(('en',))
     
     def extract_text_from_image(self, image: Union[Image.Image, bytes]) -> str:
         """
@@ -48,20 +67,15 @@ class OCRService:
             Extracted text from all pages
         """
         try:
-            # Convert PDF to images
-            images = convert_from_bytes(pdf_bytes, dpi=200)
-            
-            extracted_text = []
+            # Most PDFs already carry selectable text; only OCR scanned ones
+            text = self._extract_text_layer(io.BytesIO(pdf_bytes))
+            if text is not None:
+                return text
             
-            for i, image in enumerate(images):
-                st.write(f"Processing page {i + 1}/{len(images)}...")
-                
-                # Extract text from each page
-                page_text = self.extract_text_from_image(image)
-                if page_text.strip():
-                    extracted_text.append(f"Page {i + 1}:\n{page_text}")
+            # Convert PDF to images
+            images = convert_from_bytes(pdf_bytes, dpi=200, **PDF_RASTER_OPTIONS)
             
-            return "\n\n".join(extracted_text)
+            return self._extract_text_from_pages(images)
             
         except Exception as e:
             st.error(f"Error extracting text from PDF: {str(e)}")
@@ -78,25 +92,92 @@ class OCRService:
             Extracted text from all pages
         """
         try:
-            # Convert PDF to images
-            images = convert_from_path(pdf_path, dpi=200)
+            # Most PDFs already carry selectable text; only OCR scanned ones
+            text = self._extract_text_layer(pdf_path)
+            if text is not None:
+                return text
             
-            extracted_text = []
-            
-            for i, image in enumerate(images):
-                st.write(f"Processing page {i + 1}/{len(images)}...")
-                
-                # Extract text from each page
-                page_text = self.extract_text_from_image(image)
-                if page_text.strip():
-                    extracted_text.append(f"Page {i + 1}:\n{page_text}")
+            # Convert PDF to images
+            images = convert_from_path(pdf_path, dpi=200, **PDF_RASTER_OPTIONS)
             
-            return "\n\n".join(extracted_text)
+            return self._extract_text_from_pages(images)
             
         except Exception as e:
             st.error(f"Error extracting text from PDF: {str(e)}")
             return ""
     
+    def _extract_text_layer(self, source: Union[str, io.BytesIO]) -> Optional[str]:
+        """
+        Extract the embedded text layer of a PDF without OCR
+        
+        Args:
+            source: PDF file path or in-memory PDF stream
+            
+        Returns:
+            Extracted text from all pages, or None if the PDF has too little
+            selectable text (e.g. a scanned document) and needs OCR
+        """
+        try:
+            reader = pypdf.PdfReader(source)
+            pages = [page.extract_text() or "" for page in reader.pages]
+        except Exception:
+            return None
+        
+        if not pages or sum(len(page.strip()) for page in pages) < MIN_TEXT_LAYER_CHARS_PER_PAGE * len(pages):
+            return None
+        
+        return "\n\n".join(
+            f"Page {i + 1}:\n{text.strip()}" for i, text in enumerate(pages) if text.strip()
+        )
+    
+    def _extract_text_from_pages(self, images: List[Image.Image], batch_size: int = 8) -> str:
+        """
+        Extract text from rendered PDF pages with batched OCR
+        
+        Pages of the same size are run through EasyOCR's readtext_batched
+        in groups of batch_size, so detection and recognition run once per
+        group instead of once per page.
+        
+        Args:
+            images: Page images in page order
+            batch_size: Number of pages per OCR batch
+            
+        Returns:
+            Extracted text from all pages, prefixed with page numbers
+        """
+        page_texts = [""] * len(images)
+        
+        # readtext_batched needs equally sized inputs; group pages by size
+        pages_by_size = {}
+        for i, image in enumerate(images):
+            pages_by_size.setdefault(image.size, []).append(i)
+        
+        batches = [
+            page_indices[start:start + batch_size]
+            for page_indices in pages_by_size.values()
+            for start in range(0, len(page_indices), batch_size)
+        ]
+        
+        progress_bar = st.progress(0, text=f"OCR: 0/{len(images)} pages")
+        done = 0
+        
+        for batch in batches:
+            np_images = [np.asarray(images[i]) for i in batch]
+            batch_results = self.reader.readtext_batched(np_images, batch_size=batch_size)
+            
+            for i, results in zip(batch, batch_results):
+                results = cast(List[Tuple[Any, str, float]], results)
+                page_texts[i] = ' '.join([item[1] for item in results]).strip()
+            
+            done += len(batch)
+            progress_bar.progress(done / len(images), text=f"OCR: {done}/{len(images)} pages")
+        
+        progress_bar.empty()
+        
+        return "\n\n".join(
+            f"Page {i + 1}:\n{text}" for i, text in enumerate(page_texts) if text
+        )
+    
     def process_uploaded_files(self, uploaded_files) -> List[dict]:
         """
         Process uploaded files and extract text
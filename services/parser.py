@@ -1,20 +1,48 @@
-import requests
+import httpx
 from bs4 import BeautifulSoup
 from newspaper import Article
 import streamlit as st
-from typing import Optional, Dict, List
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from typing import Optional, Dict, List, cast
+import threading
 import time
-from urllib.parse import urljoin, urlparse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
 import re
 
+# Precompiled text clean-up patterns
+_WS_RE = re.compile(r'\s+')
+_DOUBLE_NL_RE = re.compile(r'\n\s*\n')
+_COOKIE_RE = re.compile(r'(?:Cookie.*?policy|Accept.*?cookies).*?\n', re.IGNORECASE)
+
+# Minimum seconds between two requests to the same host
+HOST_DELAY = 0.5
+
+# Largest page worth downloading for text extraction
+MAX_PAGE_BYTES = 2 * 1024 * 1024
+
+# Query parameters that only track the referrer and never change the page
+TRACKING_PARAMS = {'fbclid', 'gclid', 'msclkid', 'mc_cid', 'mc_eid', 'ocid'}
+
 class ContentParser:
     """Service for parsing various types of content"""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+        # One pooled HTTP/2 client shared by every fetch, so TLS handshakes
+        # and DNS lookups are reused and concurrent requests multiplex
+        self.client = httpx.Client(
+            http2=True,
+            timeout=10,
+            follow_redirects=True,
+            limits=httpx.Limits(max_keepalive_connections=32),
+            headers={
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            }
+        )
+        # Last request time per host, for per-host rate limiting
+        self._host_last_access = defaultdict(float)
+        self._host_lock = threading.Lock()
     
     def extract_from_url(self, url: str) -> Dict[str, str]:
         """
@@ -27,10 +55,14 @@ class ContentParser:
             Dictionary with extracted content and metadata
         """
         try:
+            # Download the page once; both extractors below parse this copy
+            response = self.client.get(url)
+            response.raise_for_status()
+            
             # First try with newspaper3k for better article extraction
             try:
                 article = Article(url)
-                article.download()
+                article.set_html(response.text)
                 article.parse()
                 
                 if article.text and len(article.text.strip()) > 100:
@@ -46,11 +78,9 @@ class ContentParser:
             except Exception as e:
                 st.warning(f"Newspaper3k failed for {url}: {str(e)}")
             
-            # Fallback to manual parsing with BeautifulSoup
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.text, 'html.parser')
+            # Fallback to manual parsing with BeautifulSoup on the same HTML
+            # Parse raw bytes with lxml; it detects the encoding itself
+            soup = BeautifulSoup(response.content, 'lxml')
             
             # Remove script and style elements
             for script in soup(["script", "style", "nav", "footer", "header", "aside"]):
@@ -84,8 +114,8 @@ class ContentParser:
                 content = '\n'.join([p.get_text().strip() for p in paragraphs if p.get_text().strip()])
             
             # Clean up the content
-            content = re.sub(r'\n\s*\n', '\n\n', content)
-            content = re.sub(r'\s+', ' ', content)
+            content = _DOUBLE_NL_RE.sub('\n\n', content)
+            content = _WS_RE.sub(' ', content)
             
             return {
                 'url': url,
@@ -109,30 +139,166 @@ class ContentParser:
                 'method': 'error'
             }
     
+    def canonicalize_url(self, url: str) -> str:
+        """
+        Normalize a URL for duplicate detection
+        
+        Args:
+            url: URL to normalize
+            
+        Returns:
+            URL without fragment or tracking parameters, with sorted query params
+        """
+        parsed = urlparse(url)
+        query = sorted(
+            (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+            if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+        )
+        return urlunparse(parsed._replace(
+            netloc=parsed.netloc.lower(),
+            query=urlencode(query),
+            fragment=''
+        ))
+    
+    def dedupe_urls(self, urls: List[str]) -> List[str]:
+        """
+        Remove duplicate URLs, preserving the order of first occurrence
+        
+        Args:
+            urls: List of URLs, possibly with duplicates
+            
+        Returns:
+            List of URLs whose canonical forms are unique
+        """
+        seen = set()
+        unique_urls = []
+        
+        for url in urls:
+            canonical = self.canonicalize_url(url)
+            if url and canonical not in seen:
+                seen.add(canonical)
+                unique_urls.append(url)
+        
+        return unique_urls
+    
+    def is_html_url(self, url: str) -> bool:
+        """
+        Check with a HEAD request whether a URL looks like an HTML page
+        
+        Args:
+            url: URL to check
+            
+        Returns:
+            False if the server reports a non-HTML type or a body over
+            MAX_PAGE_BYTES, True otherwise (including when HEAD fails)
+        """
+        try:
+            response = self.client.head(url, timeout=3)
+        except httpx.HTTPError:
+            return True
+        
+        if response.status_code >= 400:
+            # Many servers reject HEAD; let the full extraction decide
+            return True
+        
+        content_type = response.headers.get('Content-Type', '').lower()
+        if content_type and not content_type.startswith(('text/html', 'application/xhtml')):
+            return False
+        
+        content_length = response.headers.get('Content-Length', '')
+        if content_length.isdigit() and int(content_length) > MAX_PAGE_BYTES:
+            return False
+        
+        return True
+    
+    def filter_html_urls(self, urls: List[str], limit: Optional[int] = None) -> List[str]:
+        """
+        Drop URLs that point at PDFs, media, or oversized pages before extraction
+        
+        Args:
+            urls: List of URLs to check
+            limit: Stop once this many URLs have passed; checks not yet
+                started are cancelled
+            
+        Returns:
+            URLs that passed the HEAD pre-check, in their original order
+        """
+        if not urls:
+            return []
+        
+        kept = []
+        with ThreadPoolExecutor(max_workers=min(8, len(urls))) as executor:
+            futures = [executor.submit(self.is_html_url, url) for url in urls]
+            # Collect in input order so the earliest passing URLs are kept
+            for url, future in zip(urls, futures):
+                if future.result():
+                    kept.append(url)
+                if limit is not None and len(kept) >= limit:
+                    for pending in futures:
+                        pending.cancel()
+                    break
+        
+        return kept
+    
     def extract_multiple_urls(self, urls: List[str], progress_callback=None) -> List[Dict[str, str]]:
         """
-        Extract content from multiple URLs with progress tracking
+        Extract content from multiple URLs concurrently with progress tracking
         
         Args:
             urls: List of URLs to process
             progress_callback: Optional callback for progress updates
             
         Returns:
-            List of extracted content dictionaries
+            List of extracted content dictionaries, in the same order as urls
         """
-        results = []
+        if not urls:
+            return []
+        
+        results: List[Optional[Dict[str, str]]] = [None] * len(urls)
         
-        for i, url in enumerate(urls):
-            if progress_callback:
-                progress_callback(i + 1, len(urls), url)
+        # Workers need the script run context to render st.warning/st.error
+        ctx = get_script_run_ctx()
+        with ThreadPoolExecutor(
+            max_workers=min(8, len(urls)),
+            initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)
+        ) as executor:
+            futures = {
+                executor.submit(self._extract_with_host_delay, url): i
+                for i, url in enumerate(urls)
+            }
             
-            result = self.extract_from_url(url)
-            results.append(result)
+            for completed, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                results[i] = future.result()
+                
+                if progress_callback:
+                    progress_callback(completed, len(urls), urls[i])
+        
+        return cast(List[Dict[str, str]], results)
+    
+    def _extract_with_host_delay(self, url: str) -> Dict[str, str]:
+        """
+        Extract a URL, waiting first if the same host was hit less than
+        HOST_DELAY seconds ago so concurrent fetches stay respectful
+        
+        Args:
+            url: URL to extract content from
             
-            # Small delay to be respectful to servers
-            time.sleep(0.5)
+        Returns:
+            Dictionary with extracted content and metadata
+        """
+        host = urlparse(url).netloc
+        
+        # Reserve the next free slot for this host, then sleep outside the lock
+        with self._host_lock:
+            now = time.monotonic()
+            wait = max(0.0, self._host_last_access[host] + HOST_DELAY - now)
+            self._host_last_access[host] = now + wait
+        
+        if wait:
+            time.sleep(wait)
         
-        return results
+        return self.extract_from_url(url)
     
     def clean_text(self, text: str) -> str:
         """
@@ -148,11 +314,10 @@ class ContentParser:
             return ""
         
         # Remove extra whitespace and normalize line breaks
-        text = re.sub(r'\s+', ' ', text)
-        text = re.sub(r'\n\s*\n', '\n\n', text)
+        text = _WS_RE.sub(' ', text)
+        text = _DOUBLE_NL_RE.sub('\n\n', text)
         
         # Remove common unwanted patterns
-        text = re.sub(r'Cookie.*?policy.*?\n', '', text, flags=re.IGNORECASE)
-        text = re.sub(r'Accept.*?cookies.*?\n', '', text, flags=re.IGNORECASE)
+        text = _COOKIE_RE.sub('', text)
         
         return text.strip()
\ No newline at end of file
@@ -4,24 +4,191 @@ import faiss
 import numpy as np
 import pickle
 import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field, fields
 from typing import List, Dict, Tuple, Optional
-import tempfile
+
+def _faiss_simd_level() -> str:
+    """Detect which SIMD build of FAISS the loader picked (e.g. AVX2, AVX512 or GENERIC)"""
+    try:
+        options = faiss.get_compile_options().split()
+    except AttributeError:
+        # Too old to report its build options
+        return 'UNKNOWN'
+    
+    for level in ('AVX512_SPR', 'AVX512', 'AVX2', 'SVE', 'NEON'):
+        if level in options:
+            return level
+    return 'GENERIC'
+
+# SIMD instruction set the loaded FAISS library was compiled for; a GENERIC
+# build runs distance computations several times slower
+FAISS_SIMD_LEVEL = _faiss_simd_level()
+
+# Vectors added to an index per call, bounding the transient working set of big adds
+ADD_CHUNK_SIZE = 65536
+
+# Above this many vectors the exhaustive index is replaced by an HNSW graph
+HNSW_THRESHOLD = 5000
+# Graph neighbours per node and candidate list size while building the graph
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+# Smallest candidate list explored per HNSW query
+HNSW_EF_SEARCH = 32
+
+# Above this many vectors, vectors are product-quantized into an IVF index
+PQ_THRESHOLD = 10000
+# Sub-quantizers per vector and bits per sub-quantizer code (16 bytes/vector)
+PQ_M = 16
+PQ_NBITS = 8
+# Most vectors used to train the coarse and product quantizers
+PQ_TRAIN_SAMPLE = 256_000
+# Number of inverted lists probed per IVF query
+IVF_NPROBE = 16
+
+# Below this many vectors, queries are answered with one BLAS matrix product
+# instead of a FAISS search
+SMALL_CORPUS_SIZE = 1024
+
+# Recent query results kept for near-duplicate queries
+QUERY_CACHE_SIZE = 256
+# Random-projection sign bits hashed into a query cache key
+QUERY_CACHE_BITS = 64
+# Cosine similarity a new query needs to a cached one to reuse its results
+QUERY_CACHE_MIN_SIMILARITY = 0.98
+
+@dataclass(slots=True)
+class Document:
+    """A document chunk stored alongside its embedding"""
+    content: str
+    title: str = ''
+    url: str = ''
+    source: str = ''
+    chunk_id: int = 0
+    total_chunks: int = 1
+    metadata: Dict = field(default_factory=dict)
+
+# Column names of the document store, in Document field order
+DOCUMENT_FIELDS = tuple(f.name for f in fields(Document))
 
 class VectorStore:
     """Service for storing and searching document embeddings using FAISS"""
     
-    def __init__(self):
-        """Initialize the vector store"""
+    def __init__(self, persist_dir: Optional[str] = None, use_gpu: bool = False):
+        """
+        Initialize the vector store
+
+        Args:
+            persist_dir: Optional directory to persist the index and documents to
+            use_gpu: Train IVF indexes on the first GPU when one is available
+                (requires a faiss-gpu build); serving always stays on CPU
+        """
         self.index = None
-        self.documents = []
+        # Documents stored column-wise: Document field name -> object array, one row per vector
+        self._columns: Dict[str, np.ndarray] = {}
+        self._documents_lock = threading.Lock()
+        self._num_documents = 0
+        # The store is shared by every session: writers (create, add, load,
+        # clear, and the save that follows them) run one at a time, and the
+        # index lock keeps searches off the FAISS index while it is mutated
+        self._write_lock = threading.RLock()
+        self._index_lock = threading.RLock()
         self.dimension = None
+        self.persist_dir = persist_dir
+        self.use_gpu = use_gpu
+        # LRU of recent searches: projection hash -> (query, top_k, scores, ids)
+        self._query_cache: OrderedDict = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        self._rp_matrix: Optional[np.ndarray] = None
+        # Decoded vectors of a small exhaustive index, for whole-corpus ranking
+        self._embeddings: Optional[np.ndarray] = None
+    
+    @property
+    def documents(self) -> List[Dict]:
+        """All stored documents, rebuilt as dictionaries in index order"""
+        return self.get_documents(np.arange(self._num_documents))
+    
+    @documents.setter
+    def documents(self, documents: List[Dict]):
+        self._set_columns(self._to_columns(documents), len(documents))
+    
+    def _set_columns(self, columns: Dict[str, np.ndarray], count: int):
+        """
+        Replace all stored documents with prebuilt columns
+        
+        Args:
+            columns: Document columns from _to_columns
+            count: Number of documents in the columns
+        """
+        with self._documents_lock:
+            self._columns = columns
+            self._num_documents = count
+        self._invalidate_caches()
+    
+    def _to_columns(self, documents: List[Dict]) -> Dict[str, np.ndarray]:
+        """
+        Split document dictionaries into one object array per Document field
+        
+        Args:
+            documents: List of document dictionaries with Document's keys
+            
+        Returns:
+            Dictionary of field name to object array; missing optional
+            fields take the Document defaults
+        """
+        columns = {name: np.empty(len(documents), dtype=object) for name in DOCUMENT_FIELDS}
+        
+        for i, doc in enumerate(documents):
+            record = Document(**doc)
+            for name in DOCUMENT_FIELDS:
+                columns[name][i] = getattr(record, name)
+        
+        return columns
+    
+    def _append_columns(self, new_columns: Dict[str, np.ndarray], count: int):
+        """
+        Append document columns onto the stored columns
+        
+        Args:
+            new_columns: Document columns from _to_columns
+            count: Number of documents in the columns
+        """
+        with self._documents_lock:
+            if self._columns:
+                self._columns = {
+                    name: np.concatenate([self._columns[name], new_columns[name]])
+                    for name in DOCUMENT_FIELDS
+                }
+            else:
+                self._columns = new_columns
+            self._num_documents += count
+        self._invalidate_caches()
+    
+    def get_documents(self, ids: np.ndarray) -> List[Dict]:
+        """
+        Gather documents by index position
+        
+        Args:
+            ids: Integer array of document indices, e.g. from search_ids
+            
+        Returns:
+            List of document dictionaries in the order of ids
+        """
+        columns = self._columns
+        if not columns:
+            return []
+        
+        taken = [columns[name].take(ids) for name in DOCUMENT_FIELDS]
+        return [dict(zip(DOCUMENT_FIELDS, values)) for values in zip(*taken)]
     
     def create_index(self, embeddings: np.ndarray, documents: List[Dict]):
         """
         Create FAISS index from embeddings and documents
         
         Args:
-            embeddings: Numpy array of embeddings
+            embeddings: Numpy array of embeddings; normalized in place if
+                already C-contiguous float32
             documents: List of document dictionaries
         """
         try:
@@ -29,17 +196,23 @@ class VectorStore:
                 st.error("No embeddings provided!")
                 return False
             
-            # Get embedding dimension
-            self.dimension = embeddings.shape[1]
-            
-            # Create FAISS index (using L2 distance)
-            self.index = faiss.IndexFlatL2(self.dimension)  # type: ignore[call-arg]
+            # Validate documents before building anything
+            columns = self._to_columns(documents)
             
-            # Add embeddings to index
-            self.index.add(embeddings.astype('float32'))
+            # Unit-length vectors make inner product equal cosine similarity
+            embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+            faiss.normalize_L2(embeddings)
             
-            # Store documents
-            self.documents = documents
+            with self._write_lock:
+                # Create FAISS index and add embeddings to it
+                index = self._build_index(embeddings)
+                
+                # Swap in the finished index together with its documents
+                with self._index_lock:
+                    self.index = index
+                    self.dimension = embeddings.shape[1]
+                    self._set_columns(columns, len(documents))
+                self.save_to_disk()
             
             st.success(f"Vector store created with {len(documents)} documents!")
             return True
@@ -48,23 +221,160 @@ class VectorStore:
             st.error(f"Error creating vector store: {str(e)}")
             return False
     
+    def _build_index(self, embeddings: np.ndarray):
+        """
+        Build a compressed FAISS index sized for the corpus and add embeddings to it
+        
+        Below PQ_THRESHOLD, vectors are stored as one byte per dimension
+        instead of four. Small corpora use an exhaustive IndexScalarQuantizer
+        whose range is fixed to [-1, 1], which bounds every component of a
+        unit vector, so later adds are never clipped.
+        Once the corpus reaches HNSW_THRESHOLD vectors, an HNSW graph over
+        the quantized vectors is built so queries visit a small part of the
+        corpus; unlike IVF centroids, the graph needs no retraining as it
+        grows. From PQ_THRESHOLD on, an IndexIVFPQ stores each vector as
+        PQ_M one-byte codes, so scores become approximate; raising
+        IVF_NPROBE trades speed for recall. All indexes rank by inner
+        product, which is cosine similarity for the normalized inputs.
+        
+        The index is wrapped in an IndexIDMap2 and vector i gets id i, so
+        search results map explicitly onto document rows.
+        
+        Args:
+            embeddings: Float32 numpy array of unit-length embeddings
+            
+        Returns:
+            Populated FAISS IndexIDMap2
+        """
+        dimension = embeddings.shape[1]
+        train_set = embeddings
+        
+        if len(embeddings) < HNSW_THRESHOLD:
+            # This index keeps growing by adds until HNSW_THRESHOLD without
+            # retraining, so train on the fixed unit-vector range rather than
+            # the range of the first batch
+            qtype = faiss.ScalarQuantizer.QT_8bit_uniform
+            index = faiss.IndexScalarQuantizer(dimension, qtype, faiss.METRIC_INNER_PRODUCT)  # type: ignore[call-arg]
+            train_set = np.array([[-1.0] * dimension, [1.0] * dimension], dtype=np.float32)
+        elif len(embeddings) < PQ_THRESHOLD:
+            # Thousands of training vectors give reliable per-dimension
+            # ranges, which spend the 8 bits more precisely than one shared range
+            qtype = faiss.ScalarQuantizer.QT_8bit
+            index = faiss.IndexHNSWSQ(dimension, qtype, HNSW_M, faiss.METRIC_INNER_PRODUCT)  # type: ignore[call-arg]
+            index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        else:
+            # ~4*sqrt(N) lists, keeping enough training points per centroid
+            nlist = max(1, min(int(4 * np.sqrt(len(embeddings))), len(embeddings) // 39))
+            quantizer = faiss.IndexFlatIP(dimension)  # type: ignore[call-arg]
+            index = faiss.IndexIVFPQ(  # type: ignore[call-arg]
+                quantizer, dimension, nlist, PQ_M, PQ_NBITS, faiss.METRIC_INNER_PRODUCT
+            )
+            if len(embeddings) > PQ_TRAIN_SAMPLE:
+                sample = np.random.default_rng(0).choice(len(embeddings), PQ_TRAIN_SAMPLE, replace=False)
+                train_set = embeddings[sample]
+        
+        index = self._train_index(index, train_set)
+        id_map = faiss.IndexIDMap2(index)
+        self._add_in_chunks(id_map, embeddings, 0)
+        return id_map
+    
+    def _add_in_chunks(self, index, embeddings: np.ndarray, start_id: int):
+        """
+        Add embeddings in ADD_CHUNK_SIZE slices with consecutive ids
+        
+        Each slice is still added with FAISS's OpenMP threads; slicing only
+        caps the per-call encoding buffers on very large adds.
+        
+        Args:
+            index: IndexIDMap2 to add to
+            embeddings: Float32 numpy array of unit-length embeddings
+            start_id: Id of the first embedding, i.e. its document row
+        """
+        for start in range(0, len(embeddings), ADD_CHUNK_SIZE):
+            chunk = embeddings[start:start + ADD_CHUNK_SIZE]
+            ids = np.arange(start_id + start, start_id + start + len(chunk), dtype=np.int64)
+            index.add_with_ids(chunk, ids)  # type: ignore[call-arg]
+    
+    def _train_index(self, index, train_set: np.ndarray):
+        """
+        Train an index, running IVF training on the GPU when enabled
+        
+        The k-means and product-quantizer training dominate IVF build time;
+        the trained index is copied back to the CPU for adding and serving.
+        
+        Args:
+            index: Untrained CPU index
+            train_set: Float32 numpy array of training vectors
+            
+        Returns:
+            Trained CPU index
+        """
+        if not (self.use_gpu and isinstance(index, faiss.IndexIVF) and faiss.get_num_gpus() > 0):
+            index.train(train_set)
+            return index
+        
+        resources = faiss.StandardGpuResources()
+        gpu_index = faiss.index_cpu_to_gpu(resources, 0, index)
+        gpu_index.train(train_set)
+        return faiss.index_gpu_to_cpu(gpu_index)
+    
+    def _base_index(self):
+        """Get the index wrapped by the id map, downcast to its concrete type"""
+        if isinstance(self.index, faiss.IndexIDMap2):
+            return faiss.downcast_index(self.index.index)
+        return self.index
+    
+    def _needs_rebuild(self, total: int) -> bool:
+        """
+        Check whether the index type no longer suits the corpus size
+        
+        Args:
+            total: Number of vectors after the pending add
+            
+        Returns:
+            True if the index should be rebuilt with _build_index
+        """
+        base = self._base_index()
+        if isinstance(base, faiss.IndexIVF):
+            return False
+        if total >= PQ_THRESHOLD:
+            return True
+        return isinstance(base, faiss.IndexScalarQuantizer) and total >= HNSW_THRESHOLD
+    
     def add_documents(self, embeddings: np.ndarray, documents: List[Dict]):
         """
         Add new documents to existing index
         
         Args:
-            embeddings: Numpy array of new embeddings
+            embeddings: Numpy array of new embeddings; normalized in place if
+                already C-contiguous float32
             documents: List of new document dictionaries
         """
         try:
-            if self.index is None:
-                return self.create_index(embeddings, documents)
-            
-            # Add embeddings to existing index
-            self.index.add(embeddings.astype('float32'))  # type: ignore[call-arg]
+            # Validate documents before the index is touched, so a bad
+            # document cannot leave vectors without document rows
+            new_columns = self._to_columns(documents)
             
-            # Add documents to existing list
-            self.documents.extend(documents)
+            with self._write_lock:
+                if self.index is None:
+                    return self.create_index(embeddings, documents)
+                
+                embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+                faiss.normalize_L2(embeddings)
+                if self._needs_rebuild(self.index.ntotal + len(embeddings)):
+                    # Corpus outgrew the current index: rebuild it with all
+                    # vectors while searches keep using the old one
+                    existing = self._base_index().reconstruct_n(0, self.index.ntotal)
+                    index = self._build_index(np.vstack([existing, embeddings]))
+                    with self._index_lock:
+                        self.index = index
+                        self._append_columns(new_columns, len(documents))
+                else:
+                    with self._index_lock:
+                        # Ids continue from the document rows, so vector i maps to row i
+                        self._add_in_chunks(self.index, embeddings, self._num_documents)
+                        self._append_columns(new_columns, len(documents))
+                self.save_to_disk()
             
             st.success(f"Added {len(documents)} documents to vector store!")
             return True
@@ -73,6 +383,229 @@ class VectorStore:
             st.error(f"Error adding documents to vector store: {str(e)}")
             return False
     
+    def search_ids_batch(self, query_embeddings: np.ndarray, top_k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search for several queries with a single FAISS call
+        
+        Args:
+            query_embeddings: Query embeddings of shape (B, d), or one (d,)
+                vector; normalized in place if already C-contiguous float32
+            top_k: Number of top results to return per query
+            
+        Returns:
+            Tuple of (cosine similarity scores as float32, document indices
+            as int64), both of shape (B, k), best match first; slots without
+            a match hold index -1
+        """
+        empty = (np.empty((0, 0), dtype=np.float32), np.empty((0, 0), dtype=np.int64))
+        try:
+            with self._index_lock:
+                if self.index is None or self._num_documents == 0:
+                    st.warning("Vector store is empty!")
+                    return empty
+                
+                # Ensure query embeddings are 2D
+                if query_embeddings.ndim == 1:
+                    query_embeddings = query_embeddings.reshape(1, -1)
+                
+                # Copy only if the buffer is not already C-contiguous float32
+                queries = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+                faiss.normalize_L2(queries)
+                
+                k = min(top_k, self._num_documents)
+                
+                small = self._num_documents < SMALL_CORPUS_SIZE or k == self._num_documents
+                embeddings = self._exhaustive_vectors() if small else None
+                if embeddings is not None and len(embeddings) == self._num_documents:
+                    distances, indices = self._small_search(queries, embeddings, k)
+                else:
+                    distances, indices = self._faiss_search(queries, k)
+                
+            # Inner products of unit vectors are already cosine similarities;
+            # clip in place since quantized codes can overshoot [-1, 1]
+            np.clip(distances, -1.0, 1.0, out=distances)
+            return distances, indices.astype(np.int64, copy=False)
+            
+        except Exception as e:
+            st.error(f"Error searching vector store: {str(e)}")
+            return empty
+    
+    def _faiss_search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search the FAISS index with the parameters of its tier
+        
+        Args:
+            queries: Unit-length float32 queries of shape (B, d)
+            k: Number of results per query
+            
+        Returns:
+            Tuple of (scores, indices), both of shape (B, k), best match first
+        """
+        # Widen the HNSW candidate list with k; search parameters are
+        # passed per call so concurrent searches never race on shared index state
+        params = None
+        base = self._base_index()
+        if isinstance(base, faiss.IndexHNSW):
+            params = faiss.SearchParametersHNSW(efSearch=max(k * 4, HNSW_EF_SEARCH))
+        elif isinstance(base, faiss.IndexIVF):
+            params = faiss.SearchParametersIVF(nprobe=IVF_NPROBE)
+        
+        # Search in FAISS index; all queries share one distance computation
+        distances, indices = self.index.search(  # type: ignore
+            x=queries,
+            k=k,
+            params=params
+        )
+        
+        # Mark out-of-range ids as missing, like FAISS's own -1
+        indices[indices >= self._num_documents] = -1
+        return distances, indices
+    
+    def _small_search(self, queries: np.ndarray, embeddings: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score queries against every vector with one matrix product
+        
+        For small corpora a single sgemm beats FAISS's per-query dispatch,
+        and it also serves requests that return the whole corpus.
+        
+        Args:
+            queries: Unit-length float32 queries of shape (B, d)
+            embeddings: Decoded index vectors of shape (N, d)
+            k: Number of results per query, at most N
+            
+        Returns:
+            Tuple of (scores, indices), both of shape (B, k), best match first
+        """
+        scores = queries @ embeddings.T
+        
+        if k < len(embeddings):
+            # Select the top k per row in linear time, then sort only those
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(len(embeddings)), scores.shape)
+        
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        return (np.take_along_axis(top_scores, order, axis=1),
+                np.take_along_axis(top, order, axis=1).astype(np.int64))
+    
+    def search_ids(self, query_embedding: np.ndarray, top_k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search for similar documents, returning parallel score and id arrays
+        
+        Args:
+            query_embedding: Query embedding vector; normalized in place if
+                already C-contiguous float32
+            top_k: Number of top results to return
+            
+        Returns:
+            Tuple of (cosine similarity scores as float32, document indices as int64),
+            best match first; pass the indices to get_documents
+        """
+        query = np.ascontiguousarray(query_embedding, dtype=np.float32).reshape(1, -1)
+        faiss.normalize_L2(query)
+        
+        key = self._query_cache_key(query[0])
+        cached = self._query_cache_get(key, query[0], top_k)
+        if cached is not None:
+            return cached
+        
+        # Held until the result is cached, so an add cannot invalidate the
+        # cache between the search and the put
+        with self._index_lock:
+            scores, ids = self.search_ids_batch(query, top_k)
+            if len(ids) == 0:
+                return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+            
+            # Drop missing (-1) ids
+            valid = ids[0] >= 0
+            result = (scores[0][valid], ids[0][valid])
+            self._query_cache_put(key, query[0].copy(), top_k, result)
+            return result
+    
+    def _query_cache_key(self, query: np.ndarray) -> bytes:
+        """
+        Hash a unit query vector by the signs of fixed random projections,
+        so near-duplicate queries usually share a key
+        
+        Args:
+            query: Normalized query vector of shape (d,)
+            
+        Returns:
+            QUERY_CACHE_BITS packed sign bits
+        """
+        if self._rp_matrix is None or self._rp_matrix.shape[0] != len(query):
+            rng = np.random.default_rng(0)
+            self._rp_matrix = rng.standard_normal((len(query), QUERY_CACHE_BITS)).astype(np.float32)
+        return np.packbits(query @ self._rp_matrix > 0).tobytes()
+    
+    def _query_cache_get(self, key: bytes, query: np.ndarray,
+                         top_k: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Return cached results for a close enough query with the same top_k"""
+        with self._query_cache_lock:
+            entry = self._query_cache.get(key)
+            if entry is None:
+                return None
+            
+            cached_query, cached_top_k, scores, ids = entry
+            if cached_top_k != top_k or float(cached_query @ query) < QUERY_CACHE_MIN_SIMILARITY:
+                return None
+            
+            self._query_cache.move_to_end(key)
+            return scores, ids
+    
+    def _query_cache_put(self, key: bytes, query: np.ndarray, top_k: int,
+                         result: Tuple[np.ndarray, np.ndarray]):
+        """Cache search results, evicting the least recently used entry when full"""
+        with self._query_cache_lock:
+            self._query_cache[key] = (query, top_k, *result)
+            self._query_cache.move_to_end(key)
+            if len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+    
+    def _invalidate_caches(self):
+        """Drop cached search results and vectors after the stored documents change"""
+        with self._query_cache_lock:
+            self._query_cache.clear()
+        self._embeddings = None
+    
+    def _exhaustive_vectors(self) -> Optional[np.ndarray]:
+        """
+        Get the decoded vectors of an exhaustive index, cached until the store changes
+        
+        Returns:
+            Float32 array of shape (N, d) with row i holding document i, or
+            None if the index is an HNSW or IVF index
+        """
+        embeddings = self._embeddings
+        if embeddings is None:
+            base = self._base_index()
+            if not isinstance(base, faiss.IndexScalarQuantizer):
+                return None
+            embeddings = base.reconstruct_n(0, base.ntotal)
+            self._embeddings = embeddings
+        return embeddings
+    
+    def search_batch(self, query_embeddings: np.ndarray, top_k: int = 5) -> List[List[Tuple[Dict, float]]]:
+        """
+        Search for similar documents for several queries at once
+        
+        Args:
+            query_embeddings: Query embeddings of shape (B, d)
+            top_k: Number of top results to return per query
+            
+        Returns:
+            One list of (document, similarity_score) tuples per query
+        """
+        scores, ids = self.search_ids_batch(query_embeddings, top_k)
+        
+        # Mask and gather every query's hits in one pass, then split per query
+        valid = ids >= 0
+        pairs = list(zip(self.get_documents(ids[valid]), scores[valid].tolist()))
+        ends = np.cumsum(valid.sum(axis=1)).tolist()
+        
+        return [pairs[start:end] for start, end in zip([0] + ends[:-1], ends)]
+    
     def search(self, query_embedding: np.ndarray, top_k: int = 5) -> List[Tuple[Dict, float]]:
         """
         Search for similar documents using semantic similarity
@@ -84,57 +617,35 @@ class VectorStore:
         Returns:
             List of (document, similarity_score) tuples
         """
-        try:
-            if self.index is None or len(self.documents) == 0:
-                st.warning("Vector store is empty!")
-                return []
-            
-            # Ensure query embedding is 2D
-            if query_embedding.ndim == 1:
-                query_embedding = query_embedding.reshape(1, -1)
-            
-            # Search in FAISS index
-            distances, indices = self.index.search(  # type: ignore
-                x=query_embedding.astype('float32'),
-                k=min(top_k, len(self.documents))
-            )
-            
-            results = []
-            for i, (distance, idx) in enumerate(zip(distances[0], indices[0])):
-                if idx < len(self.documents):
-                    # Convert L2 distance to similarity score (0-1, higher is better)
-                    similarity = 1 / (1 + distance)
-                    results.append((self.documents[idx], similarity))
-            
-            return results
-            
-        except Exception as e:
-            st.error(f"Error searching vector store: {str(e)}")
-            return []
+        results = self.search_batch(query_embedding, top_k)
+        return results[0] if results else []
     
     def get_stats(self) -> Dict:
         """Get statistics about the vector store"""
         return {
-            'num_documents': len(self.documents),
+            'num_documents': self._num_documents,
             'dimension': self.dimension,
             'has_index': self.index is not None,
-            'index_size': self.index.ntotal if self.index else 0
+            'index_size': self.index.ntotal if self.index else 0,
+            'simd_level': FAISS_SIMD_LEVEL
         }
     
     def save_to_session_state(self):
-        """Save vector store to Streamlit session state"""
+        """
+        Save vector store to Streamlit session state
+        
+        The app itself does not call this: it shares one store across
+        sessions through st.cache_resource and persists it with save_to_disk.
+        """
         try:
             if self.index is not None:
-                # Save FAISS index to bytes
-                with tempfile.NamedTemporaryFile(delete=False) as tmp:
-                    faiss.write_index(self.index, tmp.name)
-                    with open(tmp.name, 'rb') as f:
-                        index_bytes = f.read()
-                    os.unlink(tmp.name)
+                # Serialize FAISS index to bytes in memory
+                index_bytes = faiss.serialize_index(self.index).tobytes()
 
                 st.session_state['vector_store_data'] = {
                     'index_bytes': index_bytes,
-                    'documents': self.documents,
+                    'columns': self._columns,
+                    'num_documents': self._num_documents,
                     'dimension': self.dimension
                 }
 
@@ -150,16 +661,12 @@ class VectorStore:
                 data = st.session_state['vector_store_data']
 
                 # Load FAISS index from bytes
-                with tempfile.NamedTemporaryFile(delete=False) as tmp:
-                    with open(tmp.name, 'wb') as f:
-                        f.write(data['index_bytes'])
-                    self.index = faiss.read_index(tmp.name)
-                    os.unlink(tmp.name)
+                self.index = faiss.deserialize_index(np.frombuffer(data['index_bytes'], dtype=np.uint8))
 
-                self.documents = data['documents']
+                self._set_columns(data['columns'], data['num_documents'])
                 self.dimension = data['dimension']
 
-                st.success(f"Vector store loaded with {len(self.documents)} documents!")
+                st.success(f"Vector store loaded with {self._num_documents} documents!")
                 return True
 
         except Exception as e:
@@ -167,11 +674,79 @@ class VectorStore:
 
         return False
     
+    def _persist_paths(self) -> Tuple[str, str]:
+        """Get the index and documents file paths inside the persist directory"""
+        assert self.persist_dir is not None
+        return (
+            os.path.join(self.persist_dir, 'index.faiss'),
+            os.path.join(self.persist_dir, 'documents.pkl')
+        )
+
+    def save_to_disk(self):
+        """
+        Save vector store to the persist directory, if one is configured
+        
+        Both files are written beside their targets and renamed into place,
+        so a crash mid-write never leaves a truncated file behind.
+        """
+        if not self.persist_dir or self.index is None:
+            return
+
+        try:
+            with self._write_lock:
+                index_path, documents_path = self._persist_paths()
+                os.makedirs(self.persist_dir, exist_ok=True)
+                faiss.write_index(self.index, index_path + '.tmp')
+                with open(documents_path + '.tmp', 'wb') as f:
+                    pickle.dump({
+                        'columns': self._columns,
+                        'num_documents': self._num_documents,
+                        'dimension': self.dimension
+                    }, f)
+                os.replace(index_path + '.tmp', index_path)
+                os.replace(documents_path + '.tmp', documents_path)
+
+        except Exception as e:
+            st.error(f"Error saving vector store to disk: {str(e)}")
+
+    def load_from_disk(self):
+        """Load vector store from the persist directory, if one exists"""
+        if not self.persist_dir:
+            return False
+
+        try:
+            index_path, documents_path = self._persist_paths()
+            if os.path.exists(index_path) and os.path.exists(documents_path):
+                with self._write_lock:
+                    index = faiss.read_index(index_path)
+                    with open(documents_path, 'rb') as f:
+                        data = pickle.load(f)
+                    if index.ntotal != data['num_documents']:
+                        # A crash between the two renames of save_to_disk
+                        raise ValueError("index and documents on disk are out of sync")
+                    with self._index_lock:
+                        self.index = index
+                        self._set_columns(data['columns'], data['num_documents'])
+                        self.dimension = data['dimension']
+                return True
+
+        except Exception as e:
+            st.error(f"Error loading vector store from disk: {str(e)}")
+
+        return False
+
     def clear(self):
         """Clear the vector store"""
-        self.index = None
-        self.documents = []
-        self.dimension = None
+        with self._write_lock:
+            with self._index_lock:
+                self.index = None
+                self.documents = []
+                self.dimension = None
+
+            if self.persist_dir:
+                for path in self._persist_paths():
+                    if os.path.exists(path):
+                        os.unlink(path)
 
         if 'vector_store_data' in st.session_state:
             del st.session_state['vector_store_data']